@@ -0,0 +1,344 @@
+"""
+Benchmark suite of simulation, calibration, forecast and data loading
+
+Every benchmark reports the best wall-clock time of several repeats and, for
+calibrations, R^2 of the found parameters. Results are compared against the
+stored JSON baseline: a benchmark regresses if it is slower by more than the
+time tolerance and the minimum slowdown or, for calibrations, loses more R^2
+than the quality tolerance. A benchmark whose baseline is an error regresses
+until the baseline is regenerated.
+
+Calibrations run on synthetic data simulated from known parameters, so they
+do not depend on the bundled data. Timings depend on the machine, the baseline
+is regenerated on the machine benchmarks are compared on.
+
+Usage:
+    python benchmarks/run.py                    # compare against baseline
+    python benchmarks/run.py --save-baseline    # store results as baseline
+    python benchmarks/run.py -k simulate        # benchmarks with 'simulate' in name
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import warnings
+from datetime import timedelta
+from functools import cache
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from model_complex import (  # noqa: E402
+    Calibration,
+    EpidData,
+    FactoryModel,
+    Forecast,
+    ModelParams,
+)
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+POPULATION_SIZE = 500_000
+WEEKS = 30
+# simulations of a simulate benchmark, enough work for a stable timing
+SIMULATIONS = 100
+# parameters of synthetic data, a wave peaking in the middle of the season
+TRUE_PARAMS = {
+    "total": {"alpha": [0.6], "beta": [0.8]},
+    "age": {"alpha": [0.3, 0.35], "beta": [0.9, 0.5, 0.5, 0.8]},
+}
+
+BENCHMARKS: dict[str, Callable[[], dict]] = {}
+REPEATS: dict[str, int] = {}
+
+
+def benchmark(name: str, repeat: int = 5):
+    """
+    Register benchmark, the function returns metrics of its result
+
+    :param name: Name of benchmark
+    :param repeat: Number of timed runs, the best one is reported
+    """
+
+    def register(function: Callable[[], dict]) -> Callable[[], dict]:
+        BENCHMARKS[name] = function
+        REPEATS[name] = repeat
+
+        return function
+
+    return register
+
+
+@cache
+def synthetic_data(type: str) -> tuple[pd.DataFrame, ModelParams, ModelParams]:
+    """
+    Weekly newly infected simulated from known parameters with Poisson noise
+
+    :param type: 'total' or 'age'
+
+    :return: Data in the format of `EpidData.get_data`, parameters for
+        calibration and the true parameters
+    """
+    model = FactoryModel.get_model(type)
+    alpha_dim, _ = model.params()
+    initial_infectious = [100] * alpha_dim
+    true_params = ModelParams(
+        **TRUE_PARAMS[type],
+        population_size=POPULATION_SIZE,
+        initial_infectious=initial_infectious,
+    )
+
+    model.simulate(true_params, WEEKS * 7)
+    rng = np.random.default_rng(0)
+    cases = rng.poisson(model.get_weekly_newly_infected_by_group()).astype(float)
+
+    data = pd.DataFrame(
+        {f"cases_group_{group}": cases[group] for group in range(alpha_dim)}
+    )
+    data.insert(0, "datetime", pd.date_range("2022-10-03", periods=WEEKS, freq="7D"))
+    data.attrs = {"time_step": "week"}
+
+    model_params = ModelParams(
+        alpha=[0],
+        beta=[0],
+        population_size=POPULATION_SIZE,
+        initial_infectious=initial_infectious,
+    )
+
+    return data, model_params, true_params
+
+
+for model_type in ("total", "age"):
+    for duration in (70, 210, 365, 730):
+
+        @benchmark(f"simulate_{model_type}_{duration}", repeat=10)
+        def simulate(model_type=model_type, duration=duration):
+            model = FactoryModel.get_model(model_type)
+            _, _, params = synthetic_data(model_type)
+
+            for _ in range(SIMULATIONS):
+                model.simulate(params, duration)
+
+            return {"newly_infected": float(model.get_daily_newly_infected().sum())}
+
+
+CALIBRATIONS = {
+    "optuna": {"n_trials": 100, "seed": 0},
+    "annealing": {},
+    "gradient": {"n_starts": 3, "seed": 0},
+    # above the initial design of 10 points per parameter, so the emulator is used
+    "surrogate": {"n_simulations": 120, "seed": 0},
+    "abc_smc": {"population_size": 200, "generations": 3, "seed": 0},
+    "abc": {"draws": 100, "chains": 1},
+    # one process, PyMC fails to set up cores on single-CPU machines otherwise
+    "mcmc": {"tune": 500, "draws": 300, "chains": 1, "cores": 1, "seed": 0},
+}
+
+for model_type in ("total", "age"):
+    for method, kwargs in CALIBRATIONS.items():
+
+        @benchmark(f"calibration_{model_type}_{method}", repeat=1)
+        def calibrate(model_type=model_type, method=method, kwargs=kwargs):
+            data, model_params, _ = synthetic_data(model_type)
+            model = FactoryModel.get_model(model_type)
+            calibration = Calibration(model, data, model_params)
+
+            getattr(calibration, f"{method}_calibration")(**kwargs)
+
+            model.simulate(model.get_best_params(), WEEKS * 7, "week")
+            loss = calibration.get_loss("r2")
+
+            return {"r2": -float(loss(model.result.flat("newly_infected")))}
+
+
+for size in (10, 100, 1000):
+
+    @benchmark(f"forecast_{size}")
+    def forecast(size=size):
+        data, _, params = synthetic_data("total")
+        model = FactoryModel.get_model("total")
+        rng = np.random.default_rng(0)
+
+        model.set_best_params(params)
+        model.set_ci_params(
+            [
+                ModelParams(
+                    alpha=np.clip(np.add(params.alpha, rng.normal(0, 0.02, 1)), 0, 1),
+                    beta=np.clip(np.add(params.beta, rng.normal(0, 0.02, 1)), 0, 1),
+                    population_size=params.population_size,
+                    initial_infectious=params.initial_infectious,
+                )
+                for _ in range(size)
+            ]
+        )
+
+        forecast = Forecast.forecast(model, data, timedelta(weeks=4))
+
+        return {"median": float(forecast[..., 1].sum())}
+
+
+for path in sorted((ROOT / "data").iterdir()):
+    if path.is_dir():
+
+        @benchmark(f"epid_data_{path.name}", repeat=3)
+        def load(city=path.name):
+            epid_data = EpidData(city, str(ROOT), "01-01-2000", "01-01-2100")
+            data = epid_data.get_wave_data("total")
+
+            return {"rows": len(data)}
+
+
+def run(names: list[str]) -> dict[str, dict]:
+    """
+    Run benchmarks
+
+    :param names: Names of benchmarks
+
+    :return: Best seconds and metrics, or error, by names of benchmarks
+    """
+    results = {}
+
+    for name in names:
+        times = []
+
+        try:
+            for _ in range(REPEATS[name]):
+                start = time.perf_counter()
+                metrics = BENCHMARKS[name]()
+                times.append(time.perf_counter() - start)
+
+            results[name] = {"seconds": min(times), "metrics": metrics}
+        except Exception as error:
+            results[name] = {"error": f"{type(error).__name__}: {error}"}
+
+        print(f"{name:40} {_describe(results[name])}", flush=True)
+
+    return results
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    time_tolerance: float,
+    quality_tolerance: float,
+    min_slowdown: float = 0.0,
+) -> list[str]:
+    """
+    Regressions of results against baseline
+
+    :param results: Results of `run`
+    :param baseline: Stored results
+    :param time_tolerance: Allowed relative slowdown
+    :param quality_tolerance: Allowed loss of R^2
+    :param min_slowdown: Slowdown in seconds below which no benchmark regresses
+
+    :return: Descriptions of regressions
+    """
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        if "error" in baseline[name]:
+            regressions.append(f"{name}: baseline has error {baseline[name]['error']}")
+            continue
+
+        if "error" in result:
+            regressions.append(f"{name}: {result['error']}")
+            continue
+
+        ratio = result["seconds"] / baseline[name]["seconds"]
+        slowdown = result["seconds"] - baseline[name]["seconds"]
+
+        # timings of a few milliseconds are noise, not regressions
+        if ratio > 1 + time_tolerance and slowdown > min_slowdown:
+            regressions.append(f"{name}: {ratio:.2f}x slower than baseline")
+
+        r2 = result["metrics"].get("r2")
+        baseline_r2 = baseline[name]["metrics"].get("r2")
+
+        if r2 is not None and baseline_r2 is not None:
+            if r2 < baseline_r2 - quality_tolerance:
+                regressions.append(f"{name}: R^2 {r2:.3f}, baseline {baseline_r2:.3f}")
+
+    return regressions
+
+
+def _describe(result: dict) -> str:
+    if "error" in result:
+        return result["error"]
+
+    metrics = ", ".join(f"{key}={value:.4g}" for key, value in result["metrics"].items())
+
+    return f"{result['seconds']:9.4f} s  {metrics}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-k", dest="pattern", default="", help="substring of names")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--quality-tolerance", type=float, default=0.05)
+    parser.add_argument("--min-slowdown", type=float, default=0.05)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    logging.getLogger("pymc").setLevel(logging.ERROR)
+
+    names = [name for name in BENCHMARKS if args.pattern in name]
+    results = run(names)
+
+    if args.save_baseline:
+        stored = {}
+
+        if args.baseline.exists():
+            stored = json.loads(args.baseline.read_text())["results"]
+
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "machine": {
+                        "platform": platform.platform(),
+                        "processor": platform.processor(),
+                        "python": platform.python_version(),
+                    },
+                    "results": stored | results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Baseline saved to {args.baseline}")
+
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save-baseline")
+
+        return 0
+
+    regressions = compare(
+        results,
+        json.loads(args.baseline.read_text())["results"],
+        args.time_tolerance,
+        args.quality_tolerance,
+        args.min_slowdown,
+    )
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,42 @@
-from .calibration import Calibration, Forecast
+from .calibration import (
+    BatchCalibration,
+    Calibration,
+    CalibrationJob,
+    Forecast,
+    ParameterAtlas,
+    ParticleFilter,
+)
 from .epid_data import EpidData, InfluenzaData
 from .models import FactoryModel
-from .utils import ModelParams
+from .utils import (
+    FrozenModelParams,
+    ModelParams,
+    ModelParamsBatch,
+    Profiler,
+    SimulationCache,
+    SimulationResult,
+    SimulationState,
+    TraceStore,
+    WarmStart,
+)
 
 __all__ = [
+    "BatchCalibration",
     "Calibration",
+    "CalibrationJob",
     "Forecast",
     "EpidData",
     "FactoryModel",
+    "FrozenModelParams",
     "ModelParams",
+    "ModelParamsBatch",
+    "Profiler",
     "InfluenzaData",
+    "ParameterAtlas",
+    "ParticleFilter",
+    "SimulationCache",
+    "SimulationResult",
+    "SimulationState",
+    "TraceStore",
+    "WarmStart",
 ]
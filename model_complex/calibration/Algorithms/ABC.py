@@ -1,8 +1,10 @@
+from dataclasses import replace
+
 import numpy as np
 import pymc as pm
 
 from ...models import Model
-from ...utils import ModelParams
+from ...utils import ModelParams, ModelParamsBatch, TraceStore, WarmStart, profile_phase
 
 
 class ABC:
@@ -16,29 +18,45 @@ class ABC:
         model_params: ModelParams,
         sample: int = 100,
         epsilon: int = 3000,
+        max_error: float = None,
+        warm_start: WarmStart = None,
+        draws: int = 2000,
+        chains: int = None,
+        checkpoint_dir: str = None,
     ):
+        """
+        Calibrate model with sequential Monte Carlo ABC of PyMC
+
+        :param sample: Number of parameter sets drawn from the posterior
+        :param epsilon: Scale of the distance of simulated and observed data
+        :param max_error: Squared error stopping simulations early
+        :param warm_start: Previous results, initial particles are drawn from them
+        :param draws: Number of particles of a chain
+        :param chains: Number of independent chains, PyMC default if None
+        :param checkpoint_dir: Directory the posterior of every chain is saved to,
+            chains are sampled one by one and saved chains are not sampled again,
+            ci_params are drawn from the saved chains, chains of a run with other data,
+            model or settings raise ValueError
+        """
         alpha_dim, beta_dim = model.params()
         duration = len(data) // alpha_dim
-        get_newly_infected_base_on_time_step = model.get_daily_newly_infected
+        resolution = "day"
 
         if time_step == "week":
             duration *= 7
-            get_newly_infected_base_on_time_step = model.get_weekly_newly_infected
-
-        simulate_params = ModelParams(
-            alpha=[0],
-            beta=[0],
-            population_size=model_params.population_size,
-            initial_infectious=model_params.initial_infectious,
-        )
+            resolution = "week"
 
         def simulation_func(rng, alpha, beta, size=None):
 
-            simulate_params.alpha = alpha
-            simulate_params.beta = beta
-
-            model.simulate(params=simulate_params, modeling_duration=duration)
-            return get_newly_infected_base_on_time_step()
+            result = model.run(
+                params=replace(model_params, alpha=alpha, beta=beta),
+                modeling_duration=duration,
+                resolution=resolution,
+                observed=data if max_error is not None else None,
+                max_error=max_error,
+            )
+            # newly infected after the stop are zero, distance exceeds max_error
+            return result.flat("newly_infected")
 
         with pm.Model() as PMmodel:
             alpha = pm.Uniform(name="alpha", lower=0, upper=1, shape=(alpha_dim,))
@@ -53,36 +71,92 @@ class ABC:
                 observed=data,
             )
 
-            idata = pm.sample_smc(progressbar=False)
-
-        posterior = idata.posterior.stack(samples=("draw", "chain"))
-
-        alpha = np.array(
-            [
-                np.random.choice(posterior["alpha"][i], size=sample)
-                for i in range(alpha_dim)
-            ]
-        )
-        beta = np.array(
-            [np.random.choice(posterior["beta"][i], size=sample) for i in range(beta_dim)]
-        )
-
-        ci_params = []
-
-        for i in range(sample):
-
-            ci_par = ModelParams(
-                alpha=alpha[:, i],
-                beta=beta[:, i],
-                population_size=model_params.population_size,
-                initial_infectious=model_params.initial_infectious,
+            start = None
+
+            if warm_start is not None:
+                start = _start(
+                    warm_start,
+                    alpha_dim,
+                    beta_dim,
+                    draws,
+                    PMmodel.rvs_to_values[alpha].name,
+                    PMmodel.rvs_to_values[beta].name,
+                )
+
+            with profile_phase(model.profiler, "sampling"):
+                if checkpoint_dir is None:
+                    idata = pm.sample_smc(
+                        draws=draws, start=start, chains=chains, progressbar=False
+                    )
+
+                else:
+                    store = TraceStore(
+                        checkpoint_dir,
+                        TraceStore.fingerprint(
+                            model,
+                            data,
+                            model_params,
+                            warm_start,
+                            epsilon=epsilon,
+                            max_error=max_error,
+                            draws=draws,
+                        ),
+                    )
+
+                    samples = store.sample_chains(
+                        lambda chain: pm.sample_smc(
+                            draws=draws, start=start, chains=1, progressbar=False
+                        ).posterior,
+                        2 if chains is None else chains,
+                        ["alpha", "beta"],
+                        sample,
+                    )
+
+        if checkpoint_dir is not None:
+            alpha, beta = samples["alpha"].T, samples["beta"].T
+
+        else:
+            posterior = idata.posterior.stack(samples=("draw", "chain"))
+
+            alpha = np.array(
+                [
+                    np.random.choice(posterior["alpha"][i], size=sample)
+                    for i in range(alpha_dim)
+                ]
+            )
+            beta = np.array(
+                [
+                    np.random.choice(posterior["beta"][i], size=sample)
+                    for i in range(beta_dim)
+                ]
             )
 
-            ci_params.append(ci_par)
+        model.set_ci_params(ModelParamsBatch.from_points(model_params, alpha.T, beta.T))
 
-        model.set_ci_params(ci_params)
+        model.set_best_params(
+            replace(
+                model_params,
+                alpha=[a.mean() for a in alpha],
+                beta=[b.mean() for b in beta],
+            )
+        )
 
-        simulate_params.alpha = [a.mean() for a in alpha]
-        simulate_params.beta = [b.mean() for b in beta]
 
-        model.set_best_params(simulate_params)
+def _start(
+    warm_start: WarmStart,
+    alpha_dim: int,
+    beta_dim: int,
+    draws: int,
+    alpha_name: str,
+    beta_name: str,
+) -> dict:
+    """
+    Initial SMC particles resampled from the population of warm start instead
+    of the prior, in the transformed space of the value variables
+    """
+    points = np.clip(warm_start.sample(alpha_dim, beta_dim, draws, 0.02), 1e-3, 1 - 1e-3)
+
+    # interval transform of uniform (0, 1) is logit
+    points = np.log(points) - np.log1p(-points)
+
+    return {alpha_name: points[:, :alpha_dim], beta_name: points[:, alpha_dim:]}
@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Callable
+
+import numpy as np
+
+from ...models import Model
+from ...utils import ModelParams, ModelParamsBatch, WarmStart
+
+
+class ABCSMC:
+
+    @classmethod
+    def calibrate(
+        self,
+        model: Model,
+        data: np.array,
+        time_step: str,
+        model_params: ModelParams,
+        sample: int = 100,
+        population_size: int = 500,
+        generations: int = 10,
+        quantile: float = 0.5,
+        min_epsilon: float = 0,
+        min_acceptance: float = 0.01,
+        summary: Callable[[np.ndarray], np.ndarray] = None,
+        n_workers: int = 1,
+        seed: int = None,
+        warm_start: WarmStart = None,
+    ):
+        """
+        ABC population Monte Carlo with adaptive epsilon
+
+        Every population is simulated as one batch. Epsilon of the next
+        generation is the quantile of distances of the accepted particles,
+        particles are perturbed by Gaussian kernel with twice the weighted
+        covariance of the previous population.
+
+        :param sample: Number of parameter sets drawn from the last population
+        :param population_size: Number of accepted particles of a generation
+        :param generations: Maximal number of generations
+        :param quantile: Quantile of distances giving epsilon of the next generation
+        :param min_epsilon: Sampling stops once epsilon falls below it
+        :param min_acceptance: Sampling stops once acceptance rate of proposals,
+            including those outside the prior, falls below it
+        :param summary: Summary statistics of simulated data of shape (N, len(data)),
+            returns shape (N, statistics). Data itself by default
+        :param n_workers: Number of processes simulating parts of a population
+        :param seed: Seed of sampling
+        :param warm_start: Previous results, their population resampled with small
+            perturbations replaces the prior population of generation 0
+        """
+        alpha_dim, beta_dim = model.params()
+        duration = len(data) // alpha_dim
+        resolution = "day"
+
+        if time_step == "week":
+            duration *= 7
+            resolution = "week"
+
+        rng = np.random.default_rng(seed)
+        dim = alpha_dim + beta_dim
+        summary = (lambda simulated: simulated) if summary is None else summary
+        observed = summary(np.asarray(data, dtype=float)[None])[0]
+        executor = ProcessPoolExecutor(n_workers) if n_workers > 1 else None
+
+        def distances(particles):
+            params_batch = ModelParamsBatch.from_points(
+                model_params, particles[:, :alpha_dim], particles[:, alpha_dim:]
+            )
+            chunks = [
+                chunk
+                for chunk in np.array_split(np.arange(len(params_batch)), n_workers)
+                if len(chunk)
+            ]
+
+            if executor is None:
+                simulated = _simulate(model, params_batch, duration, resolution)
+            else:
+                simulated = np.concatenate(
+                    list(
+                        executor.map(
+                            _simulate,
+                            [model] * len(chunks),
+                            [params_batch[chunk] for chunk in chunks],
+                            [duration] * len(chunks),
+                            [resolution] * len(chunks),
+                        )
+                    )
+                )
+
+            return np.linalg.norm(summary(simulated) - observed, axis=-1)
+
+        try:
+            # generation 0 accepts every particle of the prior
+            particles = rng.uniform(0, 1, size=(population_size, dim))
+
+            if warm_start is not None:
+                particles = warm_start.sample(
+                    alpha_dim, beta_dim, population_size, 0.02, rng
+                )
+
+            particle_distances = distances(particles)
+            weights = np.full(population_size, 1 / population_size)
+
+            for _ in range(generations):
+                epsilon = np.quantile(particle_distances, quantile)
+
+                if epsilon < min_epsilon:
+                    break
+
+                covariance = 2 * np.atleast_2d(
+                    np.cov(particles, rowvar=False, aweights=weights)
+                )
+                precision = np.linalg.pinv(covariance)
+
+                accepted, accepted_distances, proposed = [], [], 0
+
+                while sum(map(len, accepted)) < population_size:
+                    parents = rng.choice(population_size, size=population_size, p=weights)
+                    proposals = rng.multivariate_normal(
+                        np.zeros(dim), covariance, size=population_size, method="eigh"
+                    )
+                    proposals += particles[parents]
+                    # proposals outside the prior are rejected without simulation,
+                    # but count in the acceptance rate
+                    proposed += population_size
+                    proposals = proposals[((proposals >= 0) & (proposals <= 1)).all(1)]
+
+                    if len(proposals):
+                        proposal_distances = distances(proposals)
+                        mask = proposal_distances <= epsilon
+
+                        accepted.append(proposals[mask])
+                        accepted_distances.append(proposal_distances[mask])
+
+                    if sum(map(len, accepted)) < min_acceptance * proposed:
+                        break
+
+                if not accepted:
+                    break
+
+                new_particles = np.concatenate(accepted)[:population_size]
+
+                if len(new_particles) < population_size:
+                    break
+
+                # uniform prior, weights are inverse to density of the proposal
+                difference = new_particles[:, None, :] - particles[None, :, :]
+                kernel = np.exp(
+                    -0.5 * np.einsum("ijk,kl,ijl->ij", difference, precision, difference)
+                )
+                new_weights = 1 / (kernel @ weights)
+
+                particles = new_particles
+                particle_distances = np.concatenate(accepted_distances)[:population_size]
+                weights = new_weights / new_weights.sum()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        indices = rng.choice(population_size, size=sample, p=weights)
+        model.set_ci_params(
+            ModelParamsBatch.from_points(
+                model_params,
+                particles[indices, :alpha_dim],
+                particles[indices, alpha_dim:],
+            )
+        )
+
+        best = weights @ particles
+        model.set_best_params(
+            replace(model_params, alpha=best[:alpha_dim], beta=best[alpha_dim:])
+        )
+
+
+def _simulate(
+    model: Model, params_batch: ModelParamsBatch, duration: int, resolution: str
+) -> np.ndarray:
+    return model.simulate_batch(params_batch, duration, resolution).flat("newly_infected")
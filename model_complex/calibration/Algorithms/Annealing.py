@@ -1,9 +1,11 @@
+from dataclasses import replace
+
 import numpy as np
 from scipy.optimize import dual_annealing
-from sklearn.metrics import r2_score
 
 from ...models import Model
-from ...utils import ModelParams
+from ...utils import ModelParams, WarmStart, profile_phase
+from ..Losses import FactoryLoss
 
 
 class Annealing:
@@ -15,21 +17,24 @@ class Annealing:
         data: np.array,
         time_step: str,
         model_params: ModelParams,
+        min_r2: float = None,
+        loss="r2",
+        warm_start: WarmStart = None,
     ):
         alpha_dim, beta_dim = model.params()
         duration = len(data) // alpha_dim
-        get_newly_infected_base_on_time_step = model.get_daily_newly_infected
+        resolution = "day"
 
         if time_step == "week":
             duration *= 7
-            get_newly_infected_base_on_time_step = model.get_weekly_newly_infected
+            resolution = "week"
 
-        simulate_params = ModelParams(
-            alpha=[0],
-            beta=[0],
-            population_size=model_params.population_size,
-            initial_infectious=model_params.initial_infectious,
-        )
+        if isinstance(loss, str):
+            loss = FactoryLoss.get_loss(loss, data)
+
+        # simulation of hopeless parameters stops once r2 score can't exceed min_r2
+        total_error = ((data - data.mean()) ** 2).sum()
+        max_error = None if min_r2 is None else (1 - min_r2) * total_error
 
         lw = [0] * (alpha_dim + beta_dim)
         up = [1] * (alpha_dim + beta_dim)
@@ -39,17 +44,23 @@ class Annealing:
             alpha = x[:alpha_dim]
             beta = x[alpha_dim:]
 
-            simulate_params.alpha = alpha
-            simulate_params.beta = beta
+            result = model.run(
+                params=replace(model_params, alpha=alpha, beta=beta),
+                modeling_duration=duration,
+                resolution=resolution,
+                observed=data if min_r2 is not None else None,
+                max_error=max_error,
+            )
 
-            model.simulate(params=simulate_params, modeling_duration=duration)
+            # newly infected after the stop are zero, so the loss stays hopeless
+            return float(loss(result.flat("newly_infected")))
 
-            return -r2_score(data, get_newly_infected_base_on_time_step())
+        x0 = None if warm_start is None else warm_start.best_point(alpha_dim, beta_dim)
 
-        ret = dual_annealing(AnnealingModel, bounds=list(zip(lw, up)))
-
-        simulate_params.alpha = ret.x[:alpha_dim]
-        simulate_params.beta = ret.x[alpha_dim:]
+        with profile_phase(model.profiler, "optimization"):
+            ret = dual_annealing(AnnealingModel, bounds=list(zip(lw, up)), x0=x0)
 
         model.set_ci_params([])
-        model.set_best_params(simulate_params)
+        model.set_best_params(
+            replace(model_params, alpha=ret.x[:alpha_dim], beta=ret.x[alpha_dim:])
+        )
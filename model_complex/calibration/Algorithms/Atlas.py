@@ -0,0 +1,59 @@
+from dataclasses import replace
+
+import numpy as np
+
+from ...models import Model
+from ...utils import ModelParams, ModelParamsBatch
+from ..ParameterAtlas import ParameterAtlas
+
+
+class Atlas:
+
+    @classmethod
+    def calibrate(
+        self,
+        model: Model,
+        data: np.array,
+        time_step: str,
+        model_params: ModelParams,
+        atlas: ParameterAtlas | str,
+        sample: int = 100,
+    ):
+        """
+        Calibrate model by the nearest curves of a precomputed atlas
+
+        No simulation is run, the fit is as precise as the grid of the atlas.
+
+        :param atlas: Atlas or its directory
+        :param sample: Number of nearest curves kept for confidence intervals
+        """
+        if isinstance(atlas, str):
+            atlas = ParameterAtlas(atlas)
+
+        if time_step != "week":
+            raise ValueError("Atlas stores weekly curves, data must be weekly")
+
+        if atlas.model_type != type(model).__name__:
+            raise ValueError(
+                f"Atlas is built for {atlas.model_type}, not {type(model).__name__}"
+            )
+
+        if not np.allclose(
+            atlas.initial_infectious,
+            np.asarray(model_params.initial_infectious, dtype=float)[
+                : model.GROUPS_NUMBER
+            ],
+        ):
+            raise ValueError("Atlas is built for other initial infectious")
+
+        params, _ = atlas.nearest(data, model_params.population_size, sample)
+        ci_params = ModelParamsBatch.from_points(model_params, params.alpha, params.beta)
+
+        model.set_ci_params(ci_params)
+        model.set_best_params(
+            replace(
+                model_params,
+                alpha=ci_params.alpha[0].tolist(),
+                beta=ci_params.beta[0].tolist(),
+            )
+        )
@@ -0,0 +1,74 @@
+from dataclasses import replace
+
+import numpy as np
+from scipy.optimize import minimize
+
+from ...models import Model
+from ...utils import ModelParams, WarmStart
+from ..Losses import FactoryLoss
+
+
+class Gradient:
+
+    @classmethod
+    def calibrate(
+        self,
+        model: Model,
+        data: np.array,
+        time_step: str,
+        model_params: ModelParams,
+        n_starts: int = 10,
+        seed: int = None,
+        loss="r2",
+        warm_start: WarmStart = None,
+    ):
+        """
+        Calibrate model with L-BFGS-B using forward sensitivities of the model
+
+        :param n_starts: Number of random starting points, the best optimum is kept
+        :param seed: Seed of starting points
+        :param loss: Name of loss from `FactoryLoss` or loss with gradient
+        :param warm_start: Previous results, the best parameters are the first start
+        """
+        alpha_dim, beta_dim = model.params()
+        duration = len(data) // alpha_dim
+        resolution = "day"
+
+        if time_step == "week":
+            duration *= 7
+            resolution = "week"
+
+        if isinstance(loss, str):
+            loss = FactoryLoss.get_loss(loss, data)
+
+        def GradientModel(x):
+
+            newly_infected, sensitivities = model.sensitivities(
+                params=replace(model_params, alpha=x[:alpha_dim], beta=x[alpha_dim:]),
+                modeling_duration=duration,
+                resolution=resolution,
+            )
+            simulated = newly_infected.reshape(-1)
+            jacobian = sensitivities.reshape(len(x), -1)
+
+            return float(loss(simulated)), jacobian @ loss.gradient(simulated)
+
+        rng = np.random.default_rng(seed)
+        starts = rng.uniform(0, 1, size=(n_starts, alpha_dim + beta_dim))
+        bounds = [(0, 1)] * (alpha_dim + beta_dim)
+
+        if warm_start is not None:
+            starts[0] = warm_start.best_point(alpha_dim, beta_dim)
+
+        ret = min(
+            (
+                minimize(GradientModel, x0, jac=True, method="L-BFGS-B", bounds=bounds)
+                for x0 in starts
+            ),
+            key=lambda ret: ret.fun,
+        )
+
+        model.set_ci_params([])
+        model.set_best_params(
+            replace(model_params, alpha=ret.x[:alpha_dim], beta=ret.x[alpha_dim:])
+        )
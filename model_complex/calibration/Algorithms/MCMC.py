@@ -1,8 +1,13 @@
+from dataclasses import replace
+
 import numpy as np
 import pymc as pm
+import pytensor
+import pytensor.tensor as pt
+from pytensor.gradient import disconnected_grad
 
 from ...models import Model
-from ...utils import ModelParams
+from ...utils import ModelParams, ModelParamsBatch, TraceStore, WarmStart, profile_phase
 
 
 class MCMC:
@@ -19,6 +24,14 @@ class MCMC:
         tune=2500,
         draws=500,
         chains=4,
+        sampler="metropolis",
+        likelihood="poisson",
+        under_reporting=False,
+        warm_start: WarmStart = None,
+        informative_priors=False,
+        checkpoint_dir=None,
+        cores=None,
+        seed=None,
     ):
         """
         Parameters:
@@ -27,33 +40,203 @@ class MCMC:
             - tune -- number of mcmc warmup samples
             - draws -- number of mcmc draws
             - chains -- number of chains
+            - sampler -- 'metropolis' for DEMetropolisZ over the simulator,
+              'nuts' for NUTS over the PyTensor recurrence with explicit likelihood
+            - likelihood -- 'poisson' or 'negative_binomial' observations of 'nuts'
+            - under_reporting -- observations of 'nuts' are a fraction of newly
+              infected, fraction is sampled too
+            - warm_start -- previous results, chains start from their best parameters
+            - informative_priors -- priors of alpha and beta are Beta distributions
+              fitted to the population of warm_start with 4 times wider variance
+            - checkpoint_dir -- directory the posterior of every chain is saved to,
+              chains are sampled one by one and saved chains are not sampled again,
+              ci_params are drawn from the saved chains, chains of a run with other data,
+              model or settings raise ValueError
+            - cores -- number of processes sampling chains, PyMC default if None
+            - seed -- seed of sampling, a checkpointed chain i uses seed + i
         """
 
         alpha_dim, beta_dim = model.params()
         duration = len(data) // alpha_dim
-        get_newly_infected_base_on_time_step = model.get_daily_newly_infected
+        resolution = "day"
 
         if time_step == "week":
             duration *= 7
-            get_newly_infected_base_on_time_step = model.get_weekly_newly_infected
+            resolution = "week"
+
+        def sample_chains(chains, seed=seed):
+            with profile_phase(model.profiler, "sampling"):
+                if sampler == "nuts":
+                    return self._sample_nuts(
+                        model,
+                        data,
+                        model_params,
+                        duration,
+                        resolution,
+                        likelihood,
+                        under_reporting,
+                        tune,
+                        draws,
+                        chains,
+                        warm_start,
+                        informative_priors,
+                        cores,
+                        seed,
+                    )
+
+                return self._sample_simulator(
+                    model,
+                    data,
+                    model_params,
+                    duration,
+                    resolution,
+                    epsilon,
+                    tune,
+                    draws,
+                    chains,
+                    warm_start,
+                    informative_priors,
+                    cores,
+                    seed,
+                )
+
+        rng = np.random.default_rng(seed)
+
+        if checkpoint_dir is not None:
+            store = TraceStore(
+                checkpoint_dir,
+                TraceStore.fingerprint(
+                    model,
+                    data,
+                    model_params,
+                    warm_start,
+                    sampler=sampler,
+                    epsilon=epsilon,
+                    tune=tune,
+                    draws=draws,
+                    likelihood=likelihood,
+                    under_reporting=under_reporting,
+                    informative_priors=informative_priors,
+                ),
+            )
+
+            samples = store.sample_chains(
+                lambda chain: sample_chains(
+                    1, None if seed is None else seed + chain
+                ).posterior,
+                chains,
+                ["alpha", "beta"],
+                sample,
+                rng,
+            )
+            alpha, beta = samples["alpha"].T, samples["beta"].T
+
+        else:
+            posterior = sample_chains(chains).posterior.stack(samples=("draw", "chain"))
 
-        simulate_params = ModelParams(
-            alpha=[0],
-            beta=[0],
-            population_size=model_params.population_size,
-            initial_infectious=model_params.initial_infectious,
+            alpha = np.array(
+                [rng.choice(posterior["alpha"][i], size=sample) for i in range(alpha_dim)]
+            )
+            beta = np.array(
+                [rng.choice(posterior["beta"][i], size=sample) for i in range(beta_dim)]
+            )
+
+        model.set_ci_params(ModelParamsBatch.from_points(model_params, alpha.T, beta.T))
+
+        model.set_best_params(
+            replace(
+                model_params,
+                alpha=[a.mean() for a in alpha],
+                beta=[b.mean() for b in beta],
+            )
         )
 
-        def simulation_func(rng, alpha, beta, size=None):
-            simulate_params.alpha = alpha
-            simulate_params.beta = beta
+    @classmethod
+    def _sample_nuts(
+        self,
+        model: Model,
+        data: np.array,
+        model_params: ModelParams,
+        duration: int,
+        resolution: str,
+        likelihood: str,
+        under_reporting: bool,
+        tune: int,
+        draws: int,
+        chains: int,
+        warm_start: WarmStart = None,
+        informative_priors: bool = False,
+        cores: int = None,
+        seed: int = None,
+    ):
+        alpha_dim, beta_dim = model.params()
+
+        with pm.Model():
+            alpha, beta = _priors(
+                alpha_dim, beta_dim, warm_start if informative_priors else None
+            )
+
+            mean = self.newly_infected(
+                model, alpha, beta, model_params, duration, resolution
+            )
+
+            if under_reporting:
+                mean = pm.Uniform(name="reporting", lower=0, upper=1) * mean
+
+            # zero mean is impossible for observations
+            mean = mean + 1e-6
+
+            if likelihood == "negative_binomial":
+                dispersion = pm.Gamma(name="dispersion", alpha=2, beta=0.1)
+                pm.NegativeBinomial(
+                    "observed", mu=mean, alpha=dispersion, observed=np.round(data)
+                )
+            else:
+                pm.Poisson("observed", mu=mean, observed=np.round(data))
+
+            idata = pm.sample(
+                tune=tune,
+                draws=draws,
+                chains=chains,
+                cores=cores,
+                random_seed=seed,
+                initvals=_initvals(warm_start, alpha_dim, beta_dim),
+                progressbar=False,
+            )
 
-            model.simulate(params=simulate_params, modeling_duration=duration)
-            return get_newly_infected_base_on_time_step()
+        return idata
+
+    @classmethod
+    def _sample_simulator(
+        self,
+        model: Model,
+        data: np.array,
+        model_params: ModelParams,
+        duration: int,
+        resolution: str,
+        epsilon: float,
+        tune: int,
+        draws: int,
+        chains: int,
+        warm_start: WarmStart = None,
+        informative_priors: bool = False,
+        cores: int = None,
+        seed: int = None,
+    ):
+        alpha_dim, beta_dim = model.params()
+
+        def simulation_func(rng, alpha, beta, size=None):
+            result = model.run(
+                params=replace(model_params, alpha=alpha, beta=beta),
+                modeling_duration=duration,
+                resolution=resolution,
+            )
+            return result.flat("newly_infected")
 
         with pm.Model() as pm_model:
-            alpha = pm.Uniform(name="alpha", lower=0, upper=1, shape=(alpha_dim,))
-            beta = pm.Uniform(name="beta", lower=0, upper=1, shape=(beta_dim,))
+            alpha, beta = _priors(
+                alpha_dim, beta_dim, warm_start if informative_priors else None
+            )
 
             sim = pm.Simulator(
                 "sim",
@@ -72,39 +255,127 @@ class MCMC:
                 tune=tune,
                 draws=draws,
                 chains=chains,
+                cores=cores,
+                random_seed=seed,
                 step=step,
+                initvals=_initvals(warm_start, alpha_dim, beta_dim),
                 progressbar=False,
             )
-            idata.extend(pm.sample_posterior_predictive(idata, progressbar=False))
+            idata.extend(
+                pm.sample_posterior_predictive(idata, random_seed=seed, progressbar=False)
+            )
+
+        return idata
+
+    @classmethod
+    def newly_infected(
+        self,
+        model: Model,
+        alpha: pt.TensorVariable,
+        beta: pt.TensorVariable,
+        model_params: ModelParams,
+        duration: int,
+        resolution: str,
+    ) -> pt.TensorVariable:
+        """
+        Baroyan-Rvachev recurrence of the model as a PyTensor scan
 
-        posterior = idata.posterior.stack(samples=("draw", "chain"))
+        :param model: Model providing kernel, `_transmission` and `_infection`
+        :param alpha: Fraction of non-immune people, vector
+        :param beta: Effective contacts intensivity, vector
+        :param model_params: Population size and initial infectious
+        :param duration: Modeling duration
+        :param resolution: 'day' or 'week'
 
-        alpha = np.array(
+        :return: Newly infected of groups one after another, as observed data
+        """
+        groups_number = model.GROUPS_NUMBER
+        rho = float(model_params.population_size)
+        initial_infectious = np.array(
+            model_params.initial_infectious[:groups_number], dtype=float
+        )
+        # window keeps the latest day last
+        weights = model.kernel.weights[..., ::-1]
+
+        transmission = model._transmission(
+            beta[None, : model.beta_dim], np.array([[rho]])
+        )
+        exposed = alpha[: model.alpha_dim] * rho
+        # values are truncated as in the model, gradient passes the truncation
+        susceptible = exposed + disconnected_grad(pt.floor(exposed) - exposed)
+        window = pt.concatenate(
             [
-                np.random.choice(posterior["alpha"][i], size=sample)
-                for i in range(alpha_dim)
-            ]
+                pt.zeros((groups_number, len(model.kernel) - 1)),
+                initial_infectious[:, None],
+            ],
+            axis=-1,
         )
-        beta = np.array(
-            [np.random.choice(posterior["beta"][i], size=sample) for i in range(beta_dim)]
+
+        # states have no batch axis, hooks get a batch of one parameter set
+        def step(window, susceptible, transmission):
+            prevalence = pt.minimum((window * weights).sum(axis=-1), rho)
+            infection = model._infection(
+                transmission, susceptible[None], prevalence[None]
+            )[0]
+            new_infected = pt.minimum(infection, susceptible)
+            window = pt.concatenate([window[:, 1:], new_infected[:, None]], axis=-1)
+
+            return window, susceptible - new_infected, new_infected
+
+        (_, _, new_infected), _ = pytensor.scan(
+            step,
+            outputs_info=[window, susceptible, None],
+            non_sequences=[transmission],
+            n_steps=duration - 1,
         )
+        newly_infected = pt.concatenate(
+            [initial_infectious[None], new_infected], axis=0
+        ).T
 
-        ci_params = []
+        if resolution == "week":
+            newly_infected = newly_infected.reshape((groups_number, -1, 7)).sum(axis=-1)
 
-        for i in range(sample):
+        return newly_infected.flatten()
 
-            ci_par = ModelParams(
-                alpha=alpha[:, i],
-                beta=beta[:, i],
-                population_size=model_params.population_size,
-                initial_infectious=model_params.initial_infectious,
-            )
 
-            ci_params.append(ci_par)
+def _priors(alpha_dim: int, beta_dim: int, warm_start: WarmStart = None) -> tuple:
+    """
+    Uniform priors of alpha and beta, Beta priors fitted by moments to the
+    population of warm start if it has several members
+    """
+    if warm_start is None or len(warm_start.population) < 2:
+        return (
+            pm.Uniform(name="alpha", lower=0, upper=1, shape=(alpha_dim,)),
+            pm.Uniform(name="beta", lower=0, upper=1, shape=(beta_dim,)),
+        )
+
+    points = warm_start.points(alpha_dim, beta_dim)
+    mean = np.clip(points.mean(axis=0), 1e-3, 1 - 1e-3)
+    # wider than the previous posterior, bounded by the variance of a Bernoulli
+    variance = np.clip(4 * points.var(axis=0), 1e-4, 0.9 * mean * (1 - mean))
+    concentration = mean * (1 - mean) / variance - 1
+
+    return (
+        pm.Beta(
+            name="alpha",
+            alpha=(mean * concentration)[:alpha_dim],
+            beta=((1 - mean) * concentration)[:alpha_dim],
+            shape=(alpha_dim,),
+        ),
+        pm.Beta(
+            name="beta",
+            alpha=(mean * concentration)[alpha_dim:],
+            beta=((1 - mean) * concentration)[alpha_dim:],
+            shape=(beta_dim,),
+        ),
+    )
+
 
-        model.set_ci_params(ci_params)
+def _initvals(warm_start: WarmStart, alpha_dim: int, beta_dim: int) -> dict | None:
+    if warm_start is None:
+        return None
 
-        simulate_params.alpha = [a.mean() for a in alpha]
-        simulate_params.beta = [b.mean() for b in beta]
+    # bounds of the support are infinite in the transformed space
+    point = np.clip(warm_start.best_point(alpha_dim, beta_dim), 1e-3, 1 - 1e-3)
 
-        model.set_best_params(simulate_params)
+    return {"alpha": point[:alpha_dim], "beta": point[alpha_dim:]}
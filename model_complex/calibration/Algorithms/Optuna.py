@@ -1,9 +1,82 @@
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from tempfile import TemporaryDirectory
+
 import numpy as np
 import optuna
-from sklearn.metrics import r2_score
+from optuna.storages.journal import JournalFileBackend, JournalStorage
+from optuna.trial import TrialState
 
 from ...models import Model
-from ...utils import ModelParams
+from ...utils import ModelParams, WarmStart, profile_phase
+from ..Losses import FactoryLoss, Loss
+
+# trials of a database storage without heartbeat for this many seconds are
+# treated as abandoned by a dead worker
+HEARTBEAT_INTERVAL = 60
+
+
+class OptunaModel:
+
+    def __init__(
+        self,
+        model: Model,
+        data: np.array,
+        model_params: ModelParams,
+        duration: int,
+        resolution: str,
+        loss: Loss,
+    ):
+        """
+        Objective of Optuna trials, picklable to be sent to worker processes
+
+        :param model: Model for calibration
+        :param data: Observed data
+        :param model_params: Parameters of model, alpha and beta are suggested
+        :param duration: Modeling duration
+        :param resolution: Resolution of simulation
+        :param loss: Loss minimized by trials
+        """
+        self.model = model
+        self.data = data
+        self.model_params = model_params
+        self.duration = duration
+        self.resolution = resolution
+        self.loss = loss
+
+    def __call__(self, trial: optuna.Trial) -> float:
+        result = self.model.run(
+            params=self._suggest(trial),
+            modeling_duration=self.duration,
+            resolution=self.resolution,
+        )
+
+        return float(self.loss(result.flat("newly_infected")))
+
+    def evaluate(self, trials: list[optuna.Trial]) -> list[float]:
+        """
+        Objective of several trials in one vectorized simulation
+
+        :param trials: Trials asked from a study
+
+        :return: Losses of trials
+        """
+        result = self.model.simulate_batch(
+            [self._suggest(trial) for trial in trials],
+            self.duration,
+            self.resolution,
+        )
+
+        return self.loss(result.flat("newly_infected")).tolist()
+
+    def _suggest(self, trial: optuna.Trial) -> ModelParams:
+        alpha_dim, beta_dim = self.model.params()
+
+        alpha = [trial.suggest_float(f"alpha_{i}", 0, 1) for i in range(alpha_dim)]
+        beta = [trial.suggest_float(f"beta_{i}", 0, 1) for i in range(beta_dim)]
+
+        return replace(self.model_params, alpha=alpha, beta=beta)
 
 
 class Optuna:
@@ -16,45 +89,243 @@ class Optuna:
         time_step: str,
         model_params: ModelParams,
         n_trials=1000,
+        n_workers=1,
+        storage=None,
+        study_name="calibration",
+        seed=None,
+        batch_size=1,
+        loss="r2",
+        warm_start: WarmStart = None,
     ):
+        """
+        Calibrate model with Optuna
+
+        Study with storage is resumable: completed trials of the study are kept,
+        only the rest of n_trials is run. Trials of a database storage record
+        a heartbeat, running trials without it for several heartbeat intervals
+        are failed and run again, live trials of other processes are kept.
+        Trials asked in batches record no heartbeat and are not run again.
+        Journal files have no heartbeat, all their running trials are run again,
+        so a study in a journal file is resumed only when no other workers
+        are running it
 
+        :param n_trials: Number of completed trials of the study
+        :param n_workers: Number of processes running trials
+        :param storage: Path to journal file or database URL of the study,
+            temporary journal file for several workers, in-memory study otherwise
+        :param study_name: Name of the study in the storage
+        :param seed: Seed of samplers, worker i uses seed + i
+        :param batch_size: Number of trials asked at once and simulated together
+        :param loss: Name of loss from `FactoryLoss` or loss minimized by trials
+        :param warm_start: Previous results, their best parameters and a part of
+            their population are enqueued as the first trials of a new study
+        """
         alpha_dim, beta_dim = model.params()
         duration = len(data) // alpha_dim
-        get_newly_infected_base_on_time_step = model.get_daily_newly_infected
+        resolution = "day"
 
         if time_step == "week":
             duration *= 7
-            get_newly_infected_base_on_time_step = model.get_weekly_newly_infected
+            resolution = "week"
+
+        if isinstance(loss, str):
+            loss = FactoryLoss.get_loss(loss, data)
+
+        objective = OptunaModel(model, data, model_params, duration, resolution, loss)
+
+        with profile_phase(model.profiler, "optimization"):
+            if storage is None and n_workers == 1:
+                study = optuna.create_study(
+                    direction="minimize", sampler=optuna.samplers.TPESampler(seed=seed)
+                )
+                _enqueue(study, warm_start, alpha_dim, beta_dim)
+                _optimize(study, objective, n_trials, batch_size)
+                trials = study.trials
+
+            elif storage is None:
+                with TemporaryDirectory() as directory:
+                    trials = self._optimize_parallel(
+                        objective,
+                        f"{directory}/journal.log",
+                        study_name,
+                        n_trials,
+                        n_workers,
+                        seed,
+                        batch_size,
+                        warm_start,
+                    )
+
+            else:
+                trials = self._optimize_parallel(
+                    objective,
+                    storage,
+                    study_name,
+                    n_trials,
+                    n_workers,
+                    seed,
+                    batch_size,
+                    warm_start,
+                )
 
-        simulate_params = ModelParams(
-            alpha=[0],
-            beta=[0],
-            population_size=model_params.population_size,
-            initial_infectious=model_params.initial_infectious,
+        # the earliest trial of the best value wins regardless of worker timing
+        best_trial = min(
+            (trial for trial in trials if trial.state == TrialState.COMPLETE),
+            key=lambda trial: (trial.value, trial.number),
         )
 
-        def OptunaModel(trial):
+        model.set_ci_params([])
+        model.set_best_params(
+            replace(
+                model_params,
+                alpha=[best_trial.params[f"alpha_{i}"] for i in range(alpha_dim)],
+                beta=[best_trial.params[f"beta_{i}"] for i in range(beta_dim)],
+            )
+        )
+
+    @classmethod
+    def _optimize_parallel(
+        self,
+        objective: OptunaModel,
+        storage: str,
+        study_name: str,
+        n_trials: int,
+        n_workers: int,
+        seed: int,
+        batch_size: int,
+        warm_start: WarmStart = None,
+    ) -> list[optuna.trial.FrozenTrial]:
+        """
+        Run the rest of trials of the stored study on worker processes
+
+        :return: All trials of the study
+        """
+        study_storage = _get_storage(storage)
+        study = optuna.create_study(
+            storage=study_storage,
+            study_name=study_name,
+            direction="minimize",
+            load_if_exists=True,
+        )
+
+        # a resumed study already has its own best trials
+        if not study.get_trials(deepcopy=False):
+            alpha_dim, beta_dim = objective.model.params()
+            _enqueue(study, warm_start, alpha_dim, beta_dim)
+
+        if isinstance(study_storage, optuna.storages.RDBStorage):
+            # stale trials are failed and enqueued again by the retry callback
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", optuna.exceptions.ExperimentalWarning)
+                optuna.storages.fail_stale_trials(study)
+
+        else:
+            # trials left running by an interrupted run are evaluated again
+            for trial in study.get_trials(deepcopy=False, states=(TrialState.RUNNING,)):
+                study_storage.set_trial_state_values(trial._trial_id, TrialState.FAIL)
+                study.enqueue_trial(trial.params)
+
+        completed = len(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,)))
+        remaining = max(n_trials - completed, 0)
+        worker_trials = [
+            remaining // n_workers + (worker < remaining % n_workers)
+            for worker in range(n_workers)
+        ]
+
+        if n_workers == 1:
+            _optimize_worker(objective, storage, study_name, remaining, seed, batch_size)
+        else:
+            with ProcessPoolExecutor(n_workers) as executor:
+                futures = [
+                    executor.submit(
+                        _optimize_worker,
+                        objective,
+                        storage,
+                        study_name,
+                        worker_trials[worker],
+                        None if seed is None else seed + worker,
+                        batch_size,
+                    )
+                    for worker in range(n_workers)
+                    if worker_trials[worker]
+                ]
 
-            alpha = [trial.suggest_float(f"alpha_{i}", 0, 1) for i in range(alpha_dim)]
-            beta = [trial.suggest_float(f"beta_{i}", 0, 1) for i in range(beta_dim)]
+                for future in futures:
+                    future.result()
 
-            simulate_params.alpha = alpha
-            simulate_params.beta = beta
+        return study.get_trials()
 
-            model.simulate(
-                params=simulate_params,
-                modeling_duration=duration,
+
+def _get_storage(storage: str) -> optuna.storages.BaseStorage:
+    if "://" in storage:
+        # failed_trial_callback is renamed in newer Optuna, kept for 4.x before it
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", optuna.exceptions.ExperimentalWarning)
+            warnings.simplefilter("ignore", FutureWarning)
+
+            return optuna.storages.RDBStorage(
+                storage,
+                heartbeat_interval=HEARTBEAT_INTERVAL,
+                grace_period=3 * HEARTBEAT_INTERVAL,
+                failed_trial_callback=optuna.storages.RetryFailedTrialCallback(),
             )
 
-            return r2_score(data, get_newly_infected_base_on_time_step())
+    return JournalStorage(JournalFileBackend(storage))
 
-        study = optuna.create_study(direction="maximize")
-        study.optimize(OptunaModel, n_trials=n_trials)
 
-        simulate_params.alpha = [
-            study.best_params[f"alpha_{i}"] for i in range(alpha_dim)
+def _enqueue(
+    study: optuna.Study,
+    warm_start: WarmStart,
+    alpha_dim: int,
+    beta_dim: int,
+    max_trials: int = 10,
+) -> None:
+    if warm_start is None:
+        return
+
+    points = np.concatenate(
+        [
+            warm_start.best_point(alpha_dim, beta_dim)[None],
+            warm_start.points(alpha_dim, beta_dim),
         ]
-        simulate_params.beta = [study.best_params[f"beta_{i}"] for i in range(beta_dim)]
+    )
 
-        model.set_ci_params([])
-        model.set_best_params(simulate_params)
+    for point in points[:max_trials]:
+        study.enqueue_trial(
+            {f"alpha_{i}": float(point[i]) for i in range(alpha_dim)}
+            | {f"beta_{i}": float(point[alpha_dim + i]) for i in range(beta_dim)},
+            skip_if_exists=True,
+        )
+
+
+def _optimize(
+    study: optuna.Study, objective: OptunaModel, n_trials: int, batch_size: int
+) -> None:
+    if batch_size == 1:
+        study.optimize(objective, n_trials=n_trials)
+
+        return
+
+    # ask/tell: trials of a batch are sampled before any of them is told
+    for start in range(0, n_trials, batch_size):
+        trials = [study.ask() for _ in range(min(batch_size, n_trials - start))]
+
+        for trial, value in zip(trials, objective.evaluate(trials)):
+            study.tell(trial, value)
+
+
+def _optimize_worker(
+    objective: OptunaModel,
+    storage: str,
+    study_name: str,
+    n_trials: int,
+    seed: int,
+    batch_size: int,
+) -> None:
+    optuna.logging.set_verbosity(optuna.logging.ERROR)
+
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=_get_storage(storage),
+        sampler=optuna.samplers.TPESampler(seed=seed),
+    )
+    _optimize(study, objective, n_trials, batch_size)
@@ -0,0 +1,147 @@
+from dataclasses import replace
+
+import numpy as np
+from scipy.stats import norm, qmc
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+from ...models import Model
+from ...utils import ModelParams, ModelParamsBatch, WarmStart
+from ..Losses import FactoryLoss
+
+
+class Surrogate:
+
+    @classmethod
+    def calibrate(
+        self,
+        model: Model,
+        data: np.array,
+        time_step: str,
+        model_params: ModelParams,
+        n_simulations: int = 200,
+        n_initial: int = None,
+        batch_size: int = 10,
+        n_candidates: int = 2000,
+        seed: int = None,
+        loss="r2",
+        warm_start: WarmStart = None,
+    ):
+        """
+        Calibrate model with Gaussian process emulator of the loss
+
+        Loss of a Latin hypercube design over the alpha/beta box is simulated
+        first, then batches of candidates with the highest expected improvement
+        on the emulator are simulated until the budget is spent
+
+        :param n_simulations: Budget of simulations
+        :param n_initial: Size of the initial design, 10 per parameter by default
+        :param batch_size: Number of acquisition points simulated together
+        :param n_candidates: Number of candidates the acquisition is maximized over
+        :param seed: Seed of design and candidates
+        :param loss: Name of loss from `FactoryLoss` or loss
+        :param warm_start: Previous results, their best parameters and up to half
+            of the initial design from their population replace design points
+        """
+        alpha_dim, beta_dim = model.params()
+        duration = len(data) // alpha_dim
+        resolution = "day"
+
+        if time_step == "week":
+            duration *= 7
+            resolution = "week"
+
+        if isinstance(loss, str):
+            loss = FactoryLoss.get_loss(loss, data)
+
+        def SurrogateModel(points):
+
+            result = model.simulate_batch(
+                ModelParamsBatch.from_points(
+                    model_params, points[:, :alpha_dim], points[:, alpha_dim:]
+                ),
+                duration,
+                resolution,
+            )
+
+            return loss(result.flat("newly_infected"))
+
+        dim = alpha_dim + beta_dim
+        rng = np.random.default_rng(seed)
+        n_initial = min(10 * dim if n_initial is None else n_initial, n_simulations)
+
+        points = qmc.LatinHypercube(d=dim, seed=rng).random(n_initial)
+
+        if warm_start is not None:
+            warm_points = np.concatenate(
+                [
+                    warm_start.best_point(alpha_dim, beta_dim)[None],
+                    warm_start.points(alpha_dim, beta_dim),
+                ]
+            )[: max(n_initial // 2, 1)]
+            points[: len(warm_points)] = warm_points
+
+        values = SurrogateModel(points)
+
+        emulator = GaussianProcessRegressor(
+            ConstantKernel() * Matern(length_scale=np.full(dim, 0.2), nu=2.5)
+            + WhiteKernel(1e-3),
+            normalize_y=True,
+            n_restarts_optimizer=2,
+            random_state=seed,
+        )
+
+        while len(points) < n_simulations:
+            # losses span orders of magnitude, emulator fits their logarithm
+            spread = values.max() - values.min()
+            targets = np.log(values - values.min() + 1e-3 * spread + 1e-12)
+            emulator.fit(points, targets)
+
+            # global candidates and local ones around the best points
+            best_points = points[np.argsort(values)[:batch_size]]
+            candidates = np.concatenate(
+                [
+                    rng.uniform(0, 1, size=(n_candidates // 2, dim)),
+                    np.clip(
+                        best_points[
+                            rng.integers(len(best_points), size=n_candidates // 2)
+                        ]
+                        + rng.normal(0, 0.05, size=(n_candidates // 2, dim)),
+                        0,
+                        1,
+                    ),
+                ]
+            )
+
+            mean, std = emulator.predict(candidates, return_std=True)
+            improvement = targets.min() - mean
+            z = improvement / np.maximum(std, 1e-12)
+            expected_improvement = improvement * norm.cdf(z) + std * norm.pdf(z)
+
+            # best candidates, skipping ones next to already chosen points
+            count = min(batch_size, n_simulations - len(points))
+            acquisition = []
+
+            for candidate in candidates[np.argsort(-expected_improvement)]:
+                chosen = np.concatenate([points, np.reshape(acquisition, (-1, dim))])
+
+                if np.abs(chosen - candidate).max(axis=1).min() > 1e-3:
+                    acquisition.append(candidate)
+
+                if len(acquisition) == count:
+                    break
+
+            if not acquisition:
+                break
+
+            acquisition = np.array(acquisition)
+
+            points = np.concatenate([points, acquisition])
+            values = np.concatenate([values, SurrogateModel(acquisition)])
+
+        best = points[np.argmin(values)]
+
+        model.set_ci_params([])
+        model.set_best_params(
+            replace(model_params, alpha=best[:alpha_dim], beta=best[alpha_dim:])
+        )
@@ -1,6 +1,19 @@
 from .ABC import ABC
+from .ABCSMC import ABCSMC
+from .Atlas import Atlas
 from .MCMC import MCMC
 from .Optuna import Optuna
 from .Annealing import Annealing
+from .Gradient import Gradient
+from .Surrogate import Surrogate
 
-__all__ = ["ABC", "MCMC", "Optuna", "Annealing"]
\ No newline at end of file
+__all__ = [
+    "ABC",
+    "ABCSMC",
+    "Atlas",
+    "MCMC",
+    "Optuna",
+    "Annealing",
+    "Gradient",
+    "Surrogate",
+]
\ No newline at end of file
@@ -0,0 +1,287 @@
+import json
+import multiprocessing
+import sqlite3
+import time
+import traceback
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import product
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+from ..epid_data import EpidData, InfluenzaData
+from ..models import FactoryModel
+from ..utils import ModelParams, WarmStart
+from .Calibration import Calibration
+
+SOURCES = {"excel": EpidData, "influenza": InfluenzaData}
+
+
+@dataclass
+class CalibrationJob:
+    """
+    One calibration of a batch
+
+    :param source_args: Arguments of the data source, e.g. (city, path, start, end)
+        of 'excel'
+    :param type: Regime of data, 'total', 'age' or 'strain'
+    :param method: Calibration method, e.g. 'optuna' for `optuna_calibration`
+    :param kwargs: Hyperparameters of the method
+    :param source: 'excel' for `EpidData`, 'influenza' for `InfluenzaData`
+    :param model: Type of model from `FactoryModel`, the regime by default
+    :param initial_infectious: Initial infectious of every group
+    """
+
+    source_args: tuple
+    type: str = "total"
+    method: str = "optuna"
+    kwargs: dict = field(default_factory=dict)
+    source: str = "excel"
+    model: str = None
+    initial_infectious: int = 100
+
+    @property
+    def key(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True, default=str)
+
+    @classmethod
+    def grid(
+        cls,
+        sources_args: list[tuple],
+        types: list[str],
+        methods: dict[str, dict],
+        **kwargs,
+    ) -> list["CalibrationJob"]:
+        """
+        Jobs of every combination of data, regime and method
+
+        :param sources_args: Arguments of data sources, e.g. one per city and season
+        :param types: Regimes of data
+        :param methods: Hyperparameters by calibration methods
+        :param kwargs: Other fields of jobs
+
+        :return: Jobs
+        """
+        return [
+            cls(source_args, type, method, methods[method], **kwargs)
+            for source_args, type, method in product(sources_args, types, methods)
+        ]
+
+
+class BatchCalibration:
+    """
+    Calibration jobs scheduled across worker processes
+
+    Every attempt of a job runs in its own process, which is killed once the
+    time limit is exceeded. Failed and killed attempts are retried. Results
+    are stored in one SQLite database, jobs already stored as done are skipped
+    by the next run.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        n_workers: int = None,
+        time_limit: float = None,
+        retries: int = 1,
+    ) -> None:
+        """
+        Calibration jobs scheduled across worker processes
+
+        :param path: Path to SQLite database of results
+        :param n_workers: Number of jobs running at once, number of CPUs by default
+        :param time_limit: Seconds an attempt may run, unlimited if None
+        :param retries: Number of attempts after the first failed one
+        """
+        self.path = path
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.time_limit = time_limit
+        self.retries = retries
+
+        with sqlite3.connect(self.path) as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    status TEXT,
+                    attempts INTEGER,
+                    seconds REAL,
+                    r2 REAL,
+                    result TEXT,
+                    error TEXT,
+                    finished_at TEXT
+                )
+                """
+            )
+
+    def run(self, jobs: list[CalibrationJob]) -> pd.DataFrame:
+        """
+        Run jobs which are not stored as done yet
+
+        :param jobs: Calibration jobs
+
+        :return: All stored results, see `results`
+        """
+        done = set(self.results().query("status == 'done'")["key"])
+        keys = set()
+        queue = deque()
+
+        for job in jobs:
+            if job.key not in done and job.key not in keys:
+                keys.add(job.key)
+                queue.append((job, 1))
+
+        # receiver of an attempt is ready once it sends its result or exits
+        running = {}
+
+        try:
+            while queue or running:
+                while queue and len(running) < self.n_workers:
+                    job, attempt = queue.popleft()
+                    receiver, sender = multiprocessing.Pipe(duplex=False)
+                    process = multiprocessing.Process(target=_attempt, args=(job, sender))
+                    process.start()
+                    sender.close()
+                    running[receiver] = (process, job, attempt, time.monotonic())
+
+                timeout = None
+
+                if self.time_limit is not None:
+                    timeout = max(
+                        min(started for *_, started in running.values())
+                        + self.time_limit
+                        - time.monotonic(),
+                        0,
+                    )
+
+                ready = wait(list(running), timeout)
+                now = time.monotonic()
+
+                for receiver, (process, job, attempt, started) in list(running.items()):
+                    if receiver in ready:
+                        try:
+                            status, payload = receiver.recv()
+                        except EOFError:
+                            status = "failed"
+                            payload = f"Process exited with code {process.exitcode}"
+
+                    elif self.time_limit is not None and now - started >= self.time_limit:
+                        process.terminate()
+                        status = "timeout"
+                        payload = f"Time limit of {self.time_limit} s exceeded"
+
+                    else:
+                        continue
+
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+
+                    if status != "done" and attempt <= self.retries:
+                        queue.append((job, attempt + 1))
+                    else:
+                        self._save(job, status, attempt, now - started, payload)
+        finally:
+            for process, *_ in running.values():
+                process.terminate()
+
+        return self.results()
+
+    def results(self) -> pd.DataFrame:
+        """
+        Stored results
+
+        :return: Table of JSON of the job as key, status ('done', 'failed' or
+            'timeout'), number of attempts, seconds of the last attempt, R^2 of
+            the best parameters, JSON of `WarmStart`, error and finish time
+        """
+        with sqlite3.connect(self.path) as connection:
+            return pd.read_sql_query("SELECT * FROM results", connection)
+
+    def warm_start(self, job: CalibrationJob) -> WarmStart:
+        """
+        Stored results of a done job
+
+        :param job: Calibration job
+
+        :return: Warm start of the best and confidence interval parameters
+        """
+        with sqlite3.connect(self.path) as connection:
+            row = connection.execute(
+                "SELECT result FROM results WHERE key = ? AND status = 'done'",
+                (job.key,),
+            ).fetchone()
+
+        if row is None:
+            raise KeyError(f"No results of job {job.key}")
+
+        return WarmStart.from_dict(json.loads(row[0]))
+
+    def _save(
+        self,
+        job: CalibrationJob,
+        status: str,
+        attempts: int,
+        seconds: float,
+        payload: dict | str,
+    ) -> None:
+        done = status == "done"
+
+        with sqlite3.connect(self.path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.key,
+                    status,
+                    attempts,
+                    seconds,
+                    payload["r2"] if done else None,
+                    json.dumps(payload["result"]) if done else None,
+                    None if done else payload,
+                    datetime.now().isoformat(),
+                ),
+            )
+
+
+def _attempt(job: CalibrationJob, sender: multiprocessing.connection.Connection) -> None:
+    try:
+        sender.send(("done", _calibrate(job)))
+    except Exception:
+        sender.send(("failed", traceback.format_exc()))
+    finally:
+        sender.close()
+
+
+def _calibrate(job: CalibrationJob) -> dict:
+    epid_data = SOURCES[job.source](*job.source_args)
+    epid_data.get_wave_data(job.type)
+    data = epid_data.get_data()
+
+    model = FactoryModel.get_model(job.model or job.type)
+    alpha_dim, _ = model.params()
+    model_params = ModelParams(
+        alpha=[0],
+        beta=[0],
+        population_size=epid_data.get_rho() // 10,
+        initial_infectious=[job.initial_infectious] * alpha_dim,
+    )
+
+    calibration = Calibration(model, data, model_params)
+    getattr(calibration, f"{job.method}_calibration")(**job.kwargs)
+
+    duration = len(calibration.data) // alpha_dim
+    resolution = "day"
+
+    if calibration.time_step == "week":
+        duration *= 7
+        resolution = "week"
+
+    result = model.run(model.get_best_params(), duration, resolution)
+    loss = calibration.get_loss("r2")
+
+    return {
+        "r2": -float(loss(result.flat("newly_infected"))),
+        "result": WarmStart.from_model(model).to_dict(),
+    }
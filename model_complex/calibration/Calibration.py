@@ -1,12 +1,40 @@
+from functools import wraps
+
 import optuna
 
 from ..models import Model
-from ..utils import ModelParams
-from .Algorithms import ABC, MCMC, Annealing, Optuna
+from ..utils import ModelParams, Profiler, WarmStart, profile_phase
+from .Algorithms import ABC, ABCSMC, MCMC, Annealing, Atlas, Gradient, Optuna, Surrogate
+from .Losses import FactoryLoss, Loss, ProfiledLoss
 
 optuna.logging.set_verbosity(optuna.logging.ERROR)
 
 
+def _profiled(method):
+    """
+    Time the calibration method as a phase, report is attached to the model
+
+    Every calibration starts a fresh profiler, reports of previous calibrations
+    are not added up. The profiler stays attached to the model, so a following
+    forecast is added to the report of the calibration.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+
+        self.profiler = Profiler()
+        self.model.profiler = self.profiler
+
+        with self.profiler.phase(method.__name__):
+            method(self, *args, **kwargs)
+
+        self.model.profile_report = self.profiler.report()
+
+    return wrapper
+
+
 class Calibration:
 
     def __init__(
@@ -14,6 +42,8 @@ class Calibration:
         model: Model,
         data: list,
         model_params: ModelParams,
+        warm_start: WarmStart | str = None,
+        profile: bool = False,
     ) -> None:
         """
         Calibration class
@@ -24,13 +54,57 @@ class Calibration:
         :param model: Model for calibration
         :param data: Observed data for calibrating process
         :param rho: People's population
+        :param warm_start: Previous results or path to them saved by `WarmStart.save`,
+            calibrations start from them instead of the prior
+        :param profile: Count simulations and time phases of calibrations,
+            report of every calibration is stored in `model.profile_report`
         """
         self.model = model
         self.model_params = model_params
-        self.time_step = data.attrs["time_step"]
-        self.data = data.drop(columns=["datetime"]).to_numpy().T.flatten()
+        self.profiler = Profiler() if profile else None
+
+        # profiler of a model shared with other calibrations is left as it is
+        if profile:
+            self.model.profiler = self.profiler
+
+        with profile_phase(self.profiler, "prepare"):
+            self.time_step = data.attrs["time_step"]
+            self.data = data.drop(columns=["datetime"]).to_numpy().T.flatten()
+
+        self.losses: dict[str, Loss] = {}
+
+        if isinstance(warm_start, str):
+            warm_start = WarmStart.load(warm_start)
+
+        self.warm_start = warm_start
+
+    def get_loss(self, name: str) -> Loss:
+        """
+        Loss of observed data, statistics of data are computed once
 
-    def abc_calibration(self, sample=100, epsilon=3000):
+        :param name: Name of loss from `FactoryLoss`
+
+        :return: Loss
+        """
+        if name not in self.losses:
+            with profile_phase(self.profiler, "prepare"):
+                self.losses[name] = FactoryLoss.get_loss(name, self.data)
+
+        if self.profiler is not None:
+            return ProfiledLoss(self.losses[name], self.profiler)
+
+        return self.losses[name]
+
+    @_profiled
+    def abc_calibration(
+        self,
+        sample=100,
+        epsilon=3000,
+        max_error=None,
+        draws=2000,
+        chains=None,
+        checkpoint_dir=None,
+    ):
 
         ABC.calibrate(
             model=self.model,
@@ -39,9 +113,55 @@ class Calibration:
             model_params=self.model_params,
             sample=sample,
             epsilon=epsilon,
+            max_error=max_error,
+            warm_start=self.warm_start,
+            draws=draws,
+            chains=chains,
+            checkpoint_dir=checkpoint_dir,
         )
 
-    def optuna_calibration(self, n_trials=1000):
+    @_profiled
+    def abc_smc_calibration(
+        self,
+        sample=100,
+        population_size=500,
+        generations=10,
+        quantile=0.5,
+        min_epsilon=0,
+        min_acceptance=0.01,
+        summary=None,
+        n_workers=1,
+        seed=None,
+    ):
+
+        ABCSMC.calibrate(
+            model=self.model,
+            data=self.data,
+            time_step=self.time_step,
+            model_params=self.model_params,
+            sample=sample,
+            population_size=population_size,
+            generations=generations,
+            quantile=quantile,
+            min_epsilon=min_epsilon,
+            min_acceptance=min_acceptance,
+            summary=summary,
+            n_workers=n_workers,
+            seed=seed,
+            warm_start=self.warm_start,
+        )
+
+    @_profiled
+    def optuna_calibration(
+        self,
+        n_trials=1000,
+        n_workers=1,
+        storage=None,
+        study_name="calibration",
+        seed=None,
+        batch_size=1,
+        loss="r2",
+    ):
 
         Optuna.calibrate(
             model=self.model,
@@ -49,21 +169,82 @@ class Calibration:
             time_step=self.time_step,
             model_params=self.model_params,
             n_trials=n_trials,
+            n_workers=n_workers,
+            storage=storage,
+            study_name=study_name,
+            seed=seed,
+            batch_size=batch_size,
+            loss=self.get_loss(loss),
+            warm_start=self.warm_start,
         )
 
-    def annealing_calibration(self):
+    @_profiled
+    def annealing_calibration(self, min_r2=None, loss="r2"):
 
         Annealing.calibrate(
             model=self.model,
             data=self.data,
             time_step=self.time_step,
             model_params=self.model_params,
+            min_r2=min_r2,
+            loss=self.get_loss(loss),
+            warm_start=self.warm_start,
+        )
+
+    @_profiled
+    def gradient_calibration(self, n_starts=10, seed=None, loss="r2"):
+
+        Gradient.calibrate(
+            model=self.model,
+            data=self.data,
+            time_step=self.time_step,
+            model_params=self.model_params,
+            n_starts=n_starts,
+            seed=seed,
+            loss=self.get_loss(loss),
+            warm_start=self.warm_start,
+        )
+
+    @_profiled
+    def surrogate_calibration(
+        self,
+        n_simulations=200,
+        n_initial=None,
+        batch_size=10,
+        n_candidates=2000,
+        seed=None,
+        loss="r2",
+    ):
+
+        Surrogate.calibrate(
+            model=self.model,
+            data=self.data,
+            time_step=self.time_step,
+            model_params=self.model_params,
+            n_simulations=n_simulations,
+            n_initial=n_initial,
+            batch_size=batch_size,
+            n_candidates=n_candidates,
+            seed=seed,
+            loss=self.get_loss(loss),
+            warm_start=self.warm_start,
         )
 
+    @_profiled
     def mcmc_calibration(
         self,
         sample=100,
         epsilon=10000,
+        tune=2500,
+        draws=500,
+        chains=4,
+        sampler="metropolis",
+        likelihood="poisson",
+        under_reporting=False,
+        informative_priors=False,
+        checkpoint_dir=None,
+        cores=None,
+        seed=None,
     ):
 
         MCMC.calibrate(
@@ -73,4 +254,27 @@ class Calibration:
             model_params=self.model_params,
             sample=sample,
             epsilon=epsilon,
+            tune=tune,
+            draws=draws,
+            chains=chains,
+            sampler=sampler,
+            likelihood=likelihood,
+            under_reporting=under_reporting,
+            warm_start=self.warm_start,
+            informative_priors=informative_priors,
+            checkpoint_dir=checkpoint_dir,
+            cores=cores,
+            seed=seed,
+        )
+
+    @_profiled
+    def atlas_calibration(self, atlas, sample=100):
+
+        Atlas.calibrate(
+            model=self.model,
+            data=self.data,
+            time_step=self.time_step,
+            model_params=self.model_params,
+            atlas=atlas,
+            sample=sample,
         )
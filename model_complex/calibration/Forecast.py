@@ -4,6 +4,7 @@ import numpy as np
 import pandas as pd
 
 from ..models import Model
+from ..utils import ModelParamsBatch, profile_phase
 
 
 class Forecast:
@@ -16,45 +17,49 @@ class Forecast:
         duration: timedelta,
     ):
 
-        ci_params = model.get_ci_params()
-        calibration_duration = len(data)
-        group_cnt = len(ci_params[0].initial_infectious)
-
-        if data.attrs["time_step"] == "week":
-            calibration_duration *= 7
-            get_newly_infected_base_on_time_step = (
-                model.get_weekly_newly_infected_by_group
+        with profile_phase(model.profiler, "forecast"):
+            ci_params = model.get_ci_params_batch()
+            calibration_duration = len(data)
+
+            if data.attrs["time_step"] == "week":
+                calibration_duration *= 7
+                # округляем вверх кол-во недель, чтобы не выравнивать numpy матрицу
+                duration = calibration_duration + (duration.days + 6) // 7 * 7
+            else:
+                duration = calibration_duration + duration.days
+
+            # the last member of the batch is the best parameter set
+            calibration = model.calibration_result
+
+            # the calibration window is simulated once, every forecast only
+            # simulates its horizon
+            if calibration is None or calibration.duration != calibration_duration:
+                calibration = model.simulate_batch(
+                    ModelParamsBatch.concatenate([ci_params, [model.get_best_params()]]),
+                    modeling_duration=calibration_duration,
+                )
+                model.calibration_result = calibration
+
+            horizon = model.resume(calibration.state(), duration - calibration_duration)
+            newly_infected = np.concatenate(
+                [calibration.newly_infected, horizon.newly_infected], axis=-1
             )
-            # округляем вверх кол-во недель, чтобы не выравнивать numpy матрицу
-            duration = calibration_duration + (duration.days + 6) // 7 * 7
-            min_mean_max_points_cnt = duration // 7
-        else:
-            get_newly_infected_base_on_time_step = model.get_daily_newly_infected_by_group
-            duration = calibration_duration + duration.days
-            min_mean_max_points_cnt = duration
-
-        min_mean_max = np.array(
-            [
-                [[float("inf"), 0, float("-inf")] for _ in range(min_mean_max_points_cnt)]
-                for j in range(group_cnt)
-            ]
-        )
-
-        for params in ci_params:
-
-            model.simulate(params=params, modeling_duration=duration)
 
-            new_result = get_newly_infected_base_on_time_step()
-
-            for i in range(group_cnt):
-                min_mean_max[i, :, 0] = np.minimum(min_mean_max[i, :, 0], new_result[i])
-                min_mean_max[i, :, 2] = np.maximum(min_mean_max[i, :, 2], new_result[i])
-
-        model.simulate(params=model.get_best_params(), modeling_duration=duration)
-
-        new_result = get_newly_infected_base_on_time_step()
+            if data.attrs["time_step"] == "week":
+                newly_infected = newly_infected.reshape(
+                    *newly_infected.shape[:-1], -1, 7
+                ).sum(axis=-1)
+
+            forecast = np.stack(
+                [
+                    newly_infected[:-1].min(axis=0, initial=float("inf")),
+                    newly_infected[-1],
+                    newly_infected[:-1].max(axis=0, initial=float("-inf")),
+                ],
+                axis=-1,
+            )
 
-        for i in range(group_cnt):
-            min_mean_max[i, :, 1] = new_result[i]
+        if model.profiler is not None:
+            model.profile_report = model.profiler.report()
 
-        return min_mean_max
+        return forecast
@@ -0,0 +1,195 @@
+import numpy as np
+from scipy.special import gammaln, xlogy
+
+from ..utils import Profiler
+
+
+class Loss:
+    """
+    Interface for losses of simulated data
+
+    Statistics of observed data are computed once. Loss is evaluated for
+    simulated data of shape (..., len(data)), lower values are better.
+    """
+
+    name = ""
+
+    def __init__(self, data: np.ndarray):
+        """
+        Interface for losses of simulated data
+
+        :param data: Observed data
+        """
+        self.data = np.asarray(data, dtype=float)
+
+    def __call__(self, simulated: np.ndarray) -> float | np.ndarray:
+        """
+        Loss of simulated data
+
+        :param simulated: Simulated data of shape (..., len(data))
+
+        :return: Loss of shape (...)
+        """
+        raise NotImplementedError
+
+    def gradient(self, simulated: np.ndarray) -> np.ndarray:
+        """
+        Derivatives of loss by simulated data
+
+        :param simulated: Simulated data of shape (..., len(data))
+
+        :return: Derivatives of shape (..., len(data))
+        """
+        raise NotImplementedError
+
+
+class R2Loss(Loss):
+    """
+    Negative coefficient of determination
+    """
+
+    name = "r2"
+
+    def __init__(self, data: np.ndarray):
+        super().__init__(data)
+        self.total_error = ((self.data - self.data.mean()) ** 2).sum()
+
+    def __call__(self, simulated):
+        return ((simulated - self.data) ** 2).sum(axis=-1) / self.total_error - 1
+
+    def gradient(self, simulated):
+        return 2 * (simulated - self.data) / self.total_error
+
+
+class RMSELoss(Loss):
+    """
+    Root mean squared error
+    """
+
+    name = "rmse"
+
+    def __call__(self, simulated):
+        return np.sqrt(((simulated - self.data) ** 2).mean(axis=-1))
+
+    def gradient(self, simulated):
+        error = simulated - self.data
+        loss = np.sqrt((error**2).mean(axis=-1, keepdims=True))
+
+        return error / (error.shape[-1] * np.maximum(loss, np.finfo(float).tiny))
+
+
+class PoissonLoss(Loss):
+    """
+    Poisson deviance
+    """
+
+    name = "poisson"
+
+    def __init__(self, data: np.ndarray, eps: float = 1e-8):
+        """
+        Poisson deviance
+
+        :param data: Observed data
+        :param eps: Lower bound of simulated data, zero mean is impossible
+        """
+        super().__init__(data)
+        self.eps = eps
+        self.constant = (xlogy(self.data, self.data) - self.data).sum()
+
+    def __call__(self, simulated):
+        mean = np.maximum(simulated, self.eps)
+        log_likelihood = (self.data * np.log(mean) - mean).sum(axis=-1)
+
+        return 2 * (self.constant - log_likelihood)
+
+    def gradient(self, simulated):
+        mean = np.maximum(simulated, self.eps)
+
+        return np.where(simulated > self.eps, 2 * (1 - self.data / mean), 0)
+
+
+class NegativeBinomialLoss(Loss):
+    """
+    Negative log-likelihood of negative binomial distribution
+    """
+
+    name = "negative_binomial"
+
+    def __init__(self, data: np.ndarray, dispersion: float = 10, eps: float = 1e-8):
+        """
+        Negative log-likelihood of negative binomial distribution
+
+        :param data: Observed data
+        :param dispersion: Dispersion r, variance is mean + mean^2 / r
+        :param eps: Lower bound of simulated data, zero mean is impossible
+        """
+        super().__init__(data)
+        self.dispersion = dispersion
+        self.eps = eps
+        self.constant = (
+            gammaln(self.data + dispersion)
+            - gammaln(dispersion)
+            - gammaln(self.data + 1)
+            + dispersion * np.log(dispersion)
+        ).sum()
+        self.total = self.data + dispersion
+
+    def __call__(self, simulated):
+        mean = np.maximum(simulated, self.eps)
+        log_likelihood = (
+            self.data * np.log(mean) - self.total * np.log(mean + self.dispersion)
+        ).sum(axis=-1)
+
+        return -(self.constant + log_likelihood)
+
+    def gradient(self, simulated):
+        mean = np.maximum(simulated, self.eps)
+        derivative = self.total / (mean + self.dispersion) - self.data / mean
+
+        return np.where(simulated > self.eps, derivative, 0)
+
+
+class ProfiledLoss(Loss):
+    """
+    Loss evaluations timed as the 'loss' phase of the profiler
+    """
+
+    def __init__(self, loss: Loss, profiler: Profiler):
+        """
+        Loss evaluations timed as the 'loss' phase of the profiler
+
+        :param loss: Timed loss
+        :param profiler: Profiler
+        """
+        super().__init__(loss.data)
+        self.name = loss.name
+        self.loss = loss
+        self.profiler = profiler
+
+    def __call__(self, simulated):
+        with self.profiler.phase("loss"):
+            return self.loss(simulated)
+
+    def gradient(self, simulated):
+        with self.profiler.phase("loss"):
+            return self.loss.gradient(simulated)
+
+
+class FactoryLoss:
+
+    @classmethod
+    def get_loss(self, name: str, data: np.ndarray, **kwargs) -> Loss:
+        """
+        Create loss by its name
+
+        :param name: 'r2', 'rmse', 'poisson' or 'negative_binomial'
+        :param data: Observed data
+        :param kwargs: Arguments of the loss, e.g. dispersion of 'negative_binomial'
+
+        :return: Loss
+        """
+        for loss in (R2Loss, RMSELoss, PoissonLoss, NegativeBinomialLoss):
+            if loss.name == name:
+                return loss(data, **kwargs)
+
+        raise Exception("Функция потерь не существует")
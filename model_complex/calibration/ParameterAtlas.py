@@ -0,0 +1,199 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from ..models import Model
+from ..utils import ModelParams, ModelParamsBatch, WarmStart
+
+
+class ParameterAtlas:
+    """
+    Weekly newly infected precomputed over a dense (alpha, beta) grid
+
+    Curves of every population size are stored in a memory-mapped array of
+    shape (grid_size ** 2, weeks), alpha changes slowest along the rows.
+    Simulation only depends on the past, so curves of shorter seasons are
+    prefixes of the stored ones and one atlas serves every duration up to
+    its number of weeks. Queries scan the array in chunks, only the compared
+    weeks are read from disk.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Open atlas built by `build`
+
+        :param directory: Directory of the atlas
+        """
+        self.directory = Path(directory)
+
+        with open(self.directory / "atlas.json") as file:
+            meta = json.load(file)
+
+        self.model_type: str = meta["model_type"]
+        self.grid_size: int = meta["grid_size"]
+        self.weeks: int = meta["weeks"]
+        self.population_sizes: list[int] = meta["population_sizes"]
+        self.initial_infectious: list[float] = meta["initial_infectious"]
+        self.grid = np.linspace(0, 1, self.grid_size)
+        self.curves = [
+            np.load(self._path(self.directory, index), mmap_mode="r")
+            for index in range(len(self.population_sizes))
+        ]
+
+    @classmethod
+    def build(
+        cls,
+        directory: str,
+        model: Model,
+        population_sizes: list[int],
+        initial_infectious: list[float],
+        grid_size: int = 201,
+        weeks: int = 52,
+        batch_size: int = 4096,
+    ) -> "ParameterAtlas":
+        """
+        Simulate curves of the grid and store them on disk
+
+        :param directory: Directory of the atlas, created if missing
+        :param model: Model with one alpha and one beta, e.g. `TotalBRModel`
+        :param population_sizes: Population sizes curves are simulated for
+        :param initial_infectious: Initial infectious of simulations
+        :param grid_size: Number of values of alpha and of beta, both are
+            evenly spaced over [0, 1]
+        :param weeks: Number of simulated weeks, the longest season of queries
+        :param batch_size: Number of parameter sets simulated at once
+
+        :return: Atlas
+        """
+        if model.params() != (1, 1):
+            raise ValueError("Atlas requires a model with one alpha and one beta")
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        grid = np.linspace(0, 1, grid_size)
+        alpha, beta = (axis.ravel() for axis in np.meshgrid(grid, grid, indexing="ij"))
+        meta = {
+            "model_type": type(model).__name__,
+            "grid_size": grid_size,
+            "weeks": weeks,
+            "population_sizes": [int(size) for size in population_sizes],
+            "initial_infectious": [float(value) for value in initial_infectious],
+        }
+
+        for index, population_size in enumerate(meta["population_sizes"]):
+            population = ModelParams(
+                alpha=[],
+                beta=[],
+                population_size=population_size,
+                initial_infectious=meta["initial_infectious"],
+            )
+            path = cls._path(directory, index)
+            temporary = path.with_suffix(".tmp")
+            curves = np.lib.format.open_memmap(
+                temporary, mode="w+", dtype=np.float32, shape=(grid_size**2, weeks)
+            )
+
+            for start in range(0, grid_size**2, batch_size):
+                stop = min(start + batch_size, grid_size**2)
+                params_batch = ModelParamsBatch.from_points(
+                    population, alpha[start:stop, None], beta[start:stop, None]
+                )
+                result = model.simulate_batch(params_batch, weeks * 7, "week")
+                curves[start:stop] = result.weekly_newly_infected[:, 0]
+
+            curves.flush()
+            del curves
+            temporary.replace(path)
+
+        # metadata is written last, an interrupted build leaves no atlas
+        with open(directory / "atlas.json", "w") as file:
+            json.dump(meta, file)
+
+        return cls(directory)
+
+    def nearest(
+        self,
+        observed: np.ndarray,
+        population_size: int,
+        k: int = 1,
+        chunk_size: int = 65536,
+    ) -> tuple[ModelParamsBatch, np.ndarray]:
+        """
+        Parameters of curves nearest to the observed season
+
+        :param observed: Weekly newly infected from the first week on
+        :param population_size: Population size, one of the stored ones
+        :param k: Number of nearest curves
+        :param chunk_size: Number of curves compared at once
+
+        :return: Parameters of the nearest curves, sorted by distance, and sums
+            of squared errors of the curves
+        """
+        observed = np.asarray(observed, dtype=np.float32).ravel()
+
+        if len(observed) > self.weeks:
+            raise ValueError(
+                f"Atlas stores {self.weeks} weeks, observed data has {len(observed)}"
+            )
+
+        # curves of other population sizes are of other shape, not a close fit
+        if int(population_size) not in self.population_sizes:
+            raise ValueError(
+                f"Atlas is built for population sizes {self.population_sizes}, "
+                f"not {population_size}"
+            )
+
+        curves = self.curves[self.population_sizes.index(int(population_size))]
+        k = min(k, len(curves))
+
+        best_rows = np.empty(0, dtype=int)
+        best_errors = np.empty(0, dtype=np.float32)
+
+        for start in range(0, len(curves), chunk_size):
+            chunk = curves[start : start + chunk_size, : len(observed)]
+            errors = ((chunk - observed) ** 2).sum(axis=1)
+
+            rows = np.concatenate([best_rows, np.arange(start, start + len(chunk))])
+            errors = np.concatenate([best_errors, errors])
+            kept = np.argpartition(errors, k - 1)[:k] if len(errors) > k else slice(None)
+            best_rows, best_errors = rows[kept], errors[kept]
+
+        order = np.argsort(best_errors)
+        best_rows, best_errors = best_rows[order], best_errors[order]
+        alpha, beta = np.divmod(best_rows, self.grid_size)
+
+        population = ModelParams(
+            alpha=[],
+            beta=[],
+            population_size=population_size,
+            initial_infectious=self.initial_infectious,
+        )
+        params = ModelParamsBatch.from_points(
+            population, self.grid[alpha, None], self.grid[beta, None]
+        )
+
+        return params, best_errors.astype(float)
+
+    def warm_start(
+        self, observed: np.ndarray, model_params: ModelParams, k: int = 100
+    ) -> WarmStart:
+        """
+        Nearest curves as the starting point of a calibration
+
+        :param observed: Weekly newly infected from the first week on
+        :param model_params: Parameters of model, population size and initial
+            infectious are kept
+        :param k: Number of nearest curves in the population
+
+        :return: Warm start of the nearest curve and population of the k nearest
+        """
+        params, _ = self.nearest(observed, model_params.population_size, k)
+        population = ModelParamsBatch.from_points(model_params, params.alpha, params.beta)
+
+        return WarmStart(population[0], population)
+
+    @staticmethod
+    def _path(directory: Path, index: int) -> Path:
+        return directory / f"curves_{index:03d}.npy"
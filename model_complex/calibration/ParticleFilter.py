@@ -0,0 +1,222 @@
+import pickle
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from ..models import Model
+from ..utils import ModelParams, ModelParamsBatch, SimulationState, WarmStart
+
+
+class ParticleFilter:
+    """
+    Online calibration by sequential importance resampling
+
+    Particles over (alpha, beta) are simulated together up to the last
+    observation. A new observation only advances the saved simulation state
+    by one time step and reweights particles by its likelihood, so the cost
+    of an update does not grow with the season.
+
+    Particles only cover the prior by sampling, models with several groups
+    need many more particles or a warm start from a previous calibration.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        model_params: ModelParams,
+        time_step: str = "week",
+        n_particles: int = 1000,
+        sample: int = 100,
+        likelihood: str = "poisson",
+        dispersion: float = 10,
+        resample_threshold: float = 0.5,
+        jitter: float = 0.01,
+        warm_start: WarmStart = None,
+        seed: int = None,
+    ) -> None:
+        """
+        Online calibration by sequential importance resampling
+
+        :param model: Model for calibration, its best and ci parameters are set
+            after every update
+        :param model_params: Parameters of model, alpha and beta are filtered
+        :param time_step: 'week' or 'day', time step of observations
+        :param n_particles: Number of particles
+        :param sample: Number of parameter sets drawn for confidence intervals
+        :param likelihood: 'poisson' or 'negative_binomial' observations
+        :param dispersion: Dispersion of 'negative_binomial' observations
+        :param resample_threshold: Particles are resampled once the effective
+            sample size falls below this share of particles
+        :param jitter: Standard deviation of perturbation of alpha and beta after
+            resampling, susceptible of the state are shifted with alpha
+        :param warm_start: Previous results, initial particles are drawn from
+            their population instead of the uniform prior
+        :param seed: Seed of sampling
+        """
+        self.model = model
+        self.model_params = model_params
+        self.time_step = time_step
+        self.sample = sample
+        self.likelihood = likelihood
+        self.dispersion = dispersion
+        self.resample_threshold = resample_threshold
+        self.jitter = jitter
+        self.rng = np.random.default_rng(seed)
+
+        alpha_dim, beta_dim = model.params()
+
+        if warm_start is None:
+            self.particles = self.rng.uniform(
+                0, 1, size=(n_particles, alpha_dim + beta_dim)
+            )
+        else:
+            self.particles = warm_start.sample(
+                alpha_dim, beta_dim, n_particles, jitter, self.rng
+            )
+
+        self.log_weights = np.zeros(n_particles)
+        self.state: SimulationState = model.initial_state(self._params())
+        self.steps = 0
+
+    @property
+    def weights(self) -> np.ndarray:
+        weights = np.exp(self.log_weights - self.log_weights.max())
+
+        return weights / weights.sum()
+
+    @property
+    def effective_sample_size(self) -> float:
+        return 1 / (self.weights**2).sum()
+
+    def update(self, observation: np.ndarray) -> None:
+        """
+        Assimilate the newest observation
+
+        :param observation: Newly infected of the next time step by groups
+        """
+        alpha_dim, _ = self.model.params()
+        observation = np.round(np.asarray(observation, dtype=float).reshape(alpha_dim))
+
+        days = 7 if self.time_step == "week" else 1
+        simulated = np.zeros(self.state.susceptible.shape)
+
+        if self.steps == 0:
+            # the first time step includes initial infectious of the day 0
+            simulated += self.state.newly_infected[..., -1]
+            days -= 1
+
+        if days:
+            result = self.model.resume(self.state, days)
+            self.state = result.state()
+            simulated += result.newly_infected.sum(axis=-1)
+
+        self.log_weights += self._log_likelihood(observation, simulated)
+        self.steps += 1
+
+        if self.effective_sample_size < self.resample_threshold * len(self.particles):
+            self._resample()
+
+        self._set_params()
+
+    def update_data(self, data: pd.DataFrame) -> None:
+        """
+        Assimilate observations of data not seen yet
+
+        :param data: Whole season of `EpidData.get_data`, rows after the already
+            assimilated ones are used
+        """
+        if data.attrs["time_step"] != self.time_step:
+            raise ValueError("Time step of data differs from time step of the filter")
+
+        for observation in data.drop(columns=["datetime"]).to_numpy()[self.steps :]:
+            self.update(observation)
+
+    def save(self, path: str) -> None:
+        """
+        Save filter with its particles and simulation state
+
+        :param path: Path to file
+        """
+        with open(path, "wb") as file:
+            pickle.dump(self, file)
+
+    @classmethod
+    def load(cls, path: str) -> "ParticleFilter":
+        """
+        Load filter saved by `save`
+
+        :param path: Path to file
+
+        :return: Particle filter
+        """
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+    def _params(self) -> ModelParamsBatch:
+        alpha_dim, _ = self.model.params()
+
+        return ModelParamsBatch.from_points(
+            self.model_params,
+            self.particles[:, :alpha_dim],
+            self.particles[:, alpha_dim:],
+        )
+
+    def _log_likelihood(self, observation: np.ndarray, simulated: np.ndarray):
+        # zero mean is impossible for observations
+        mean = np.maximum(simulated, 1e-6)
+
+        if self.likelihood == "negative_binomial":
+            log_likelihood = stats.nbinom.logpmf(
+                observation, self.dispersion, self.dispersion / (self.dispersion + mean)
+            )
+        else:
+            log_likelihood = stats.poisson.logpmf(observation, mean)
+
+        return log_likelihood.sum(axis=-1)
+
+    def _resample(self) -> None:
+        # systematic resampling
+        n_particles = len(self.particles)
+        positions = (self.rng.uniform() + np.arange(n_particles)) / n_particles
+        indices = np.minimum(
+            np.searchsorted(np.cumsum(self.weights), positions), n_particles - 1
+        )
+
+        alpha_dim, _ = self.model.params()
+        alpha = self.particles[indices, :alpha_dim]
+        self.particles = np.clip(
+            self.particles[indices]
+            + self.rng.normal(0, self.jitter, size=self.particles.shape),
+            0,
+            1,
+        )
+        self.log_weights = np.zeros(n_particles)
+
+        # alpha sets initial susceptible, its change is carried to susceptible
+        rho = np.asarray(self.model_params.population_size, dtype=float)
+        susceptible = self.state.susceptible[indices] + np.trunc(
+            (self.particles[:, :alpha_dim] - alpha) * rho
+        )
+
+        self.state = SimulationState(
+            day=self.state.day,
+            params=self._params(),
+            susceptible=np.maximum(susceptible, 0),
+            newly_infected=self.state.newly_infected[indices],
+            recovered=self.state.recovered[indices],
+        )
+
+    def _set_params(self) -> None:
+        alpha_dim, _ = self.model.params()
+        params = self.state.params
+        weights = self.weights
+
+        indices = self.rng.choice(len(params), size=self.sample, p=weights)
+        self.model.set_ci_params(params[indices])
+
+        best = weights @ self.particles
+        self.model.set_best_params(
+            replace(self.model_params, alpha=best[:alpha_dim], beta=best[alpha_dim:])
+        )
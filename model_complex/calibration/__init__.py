@@ -1,4 +1,17 @@
+from .BatchCalibration import BatchCalibration, CalibrationJob
 from .Calibration import Calibration
 from .Forecast import Forecast
+from .Losses import FactoryLoss, Loss
+from .ParameterAtlas import ParameterAtlas
+from .ParticleFilter import ParticleFilter
 
-__all__ = ["Calibration", "Forecast"]
\ No newline at end of file
+__all__ = [
+    "BatchCalibration",
+    "Calibration",
+    "CalibrationJob",
+    "Forecast",
+    "FactoryLoss",
+    "Loss",
+    "ParameterAtlas",
+    "ParticleFilter",
+]
\ No newline at end of file
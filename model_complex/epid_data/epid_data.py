@@ -32,6 +32,10 @@ pcr_table_from_excel_to_python = {
 
 
 def date_extract(input_string):
+    # cells of daily data are read by pandas as dates already
+    if isinstance(input_string, datetime):
+        return input_string
+
     matching = re.search(r"(\d{2}\.\d{2}\.\d{4})", input_string)
     if matching:
         date_string = matching.group(1)
@@ -205,6 +209,19 @@ class EpidData:
                 ]
             ]
 
+        elif type == self.REGIME_STRAIN:
+            # shares of strains are nan in weeks without PCR tests, these weeks
+            # count as no cases, the same way total cases are summed up above
+            strain_columns = [
+                f"real_cases_strain_{strain_index}"
+                for strain_index in range(self.strains_number)
+            ]
+            self.returned_df[strain_columns] = self.returned_df[strain_columns].fillna(0)
+
+            self.returned_df = self.returned_df[
+                ["datetime", *strain_columns, "total_population"]
+            ]
+
     def __set_timedelta(self):
         deltatime = self.returned_df["datetime"]
         deltadays = (deltatime.iloc[1] - deltatime.iloc[0]).days
@@ -1,15 +1,28 @@
-from .Models import AgeGroupBRModel, TotalBRModel
+from .Models import AgeGroupBRModel, ContactMatrixBRModel, StrainBRModel, TotalBRModel
 
 
 class FactoryModel:
 
     @classmethod
-    def get_model(self, type):
+    def get_model(self, type, **kwargs):
+        """
+        Create model by its type
+
+        :param type: 'total', 'age', 'contact' or 'strain'
+        :param kwargs: Arguments of the model, e.g. groups_number of 'contact'
+            or strains_number of 'strain'
+
+        :return: Model
+        """
         match type:
             case "total":
                 return TotalBRModel()
             case "age":
                 return AgeGroupBRModel()
+            case "contact":
+                return ContactMatrixBRModel(**kwargs)
+            case "strain":
+                return StrainBRModel(**kwargs)
 
         raise Exception("Модель не существует")
 
@@ -1,30 +1,554 @@
 import numpy as np
 
-from ...utils import ModelParams
+from ...utils import (
+    ModelParams,
+    ModelParamsBatch,
+    Profiler,
+    SimulationCache,
+    SimulationResult,
+    SimulationState,
+    profile_phase,
+)
+from ..Kernel import BRKernel
 
 
 class Model:
     GROUPS_NUMBER = 0
 
-    br_func_array = [0.1, 0.1, 1, 0.9, 0.55, 0.3, 0.15, 0.05]
+    br_func_array = BRKernel.br_func_array
 
-    is_ci_ready = False
-    is_calibrated = False
-    calibration_params: ModelParams = None
-    ci_params: list[ModelParams] = None
-    newly_infected: list = None
-    prevalence: list = None
-    recovered: list = None
-
-    def __init__(self):
+    def __init__(self, kernel: BRKernel = None):
         """
         Interface for all Models
+
+        Simulation itself (`run`, `simulate_batch`, `resume`) does not change
+        the model, so one model can be shared by threads and processes. `simulate`
+        and the getters are the stateful API on top of it.
+
+        :param kernel: Infectivity kernel, Baroyan-Rvachev function by default
         """
         self.alpha_dim = 0
         self.beta_dim = 0
+        self.kernel = BRKernel(self.br_func_array) if kernel is None else kernel
+
+        self.is_ci_ready = False
+        self.is_calibrated = False
+        self.calibration_params: ModelParams = None
+        self.ci_params: ModelParamsBatch = None
+        self.result: SimulationResult = None
+        # daily results of the CI and best parameter sets over the calibration
+        # window, forecasts resume from its last day
+        self.calibration_result: SimulationResult = None
+        self.cache: SimulationCache = None
+        # opt-in instrumentation, report of the last profiled calibration
+        self.profiler: Profiler = None
+        self.profile_report: dict = None
+        # newly infected below the tolerance for the whole kernel window are
+        # treated as the end of the epidemic
+        self.burnout_tolerance = 1e-6
+
+    def simulate(
+        self, params: ModelParams, modeling_duration: int, resolution: str = "day"
+    ) -> SimulationResult:
+        """
+        Simulate epidemic, results are available through the getters
+
+        :param params: Model parameters
+        :param modeling_duration: duration of modeling
+        :param resolution: 'day' keeps all daily series, 'week' keeps only weekly
+            newly infected, summed up during simulation
+
+        :return: Results of simulation
+        """
+        self.result = self.run(params, modeling_duration, resolution)
+
+        return self.result
+
+    def run(
+        self,
+        params: ModelParams,
+        modeling_duration: int,
+        resolution: str = "day",
+        observed: np.ndarray = None,
+        max_error: float = None,
+    ) -> SimulationResult:
+        """
+        Simulate epidemic without storing results in the model
+
+        :param params: Model parameters
+        :param modeling_duration: duration of modeling
+        :param resolution: 'day' keeps all daily series, 'week' keeps only weekly
+            newly infected, summed up during simulation
+        :param observed: Observed newly infected of the resolution, groups one
+            after another, sum of squared errors is stored in `result.error`
+        :param max_error: Simulation stops once sum of squared errors exceeds it
+
+        :return: Results of simulation, read-only if the cache is enabled
+        """
+        if self.cache is None or observed is not None:
+            return self.simulate_batch(
+                [params], modeling_duration, resolution, observed, max_error
+            )[0]
+
+        return self.cache.get_or_simulate(
+            self.cache.key(
+                type(self).__name__,
+                params,
+                modeling_duration,
+                resolution,
+                self.kernel.weights,
+                self.burnout_tolerance,
+            ),
+            lambda: self.simulate_batch([params], modeling_duration, resolution)[0],
+        )
+
+    def enable_cache(self, maxsize: int = 1024, decimals: int = None) -> SimulationCache:
+        """
+        Cache results of `run` and `simulate`
+
+        :param maxsize: Maximal number of stored results
+        :param decimals: Number of decimals alpha and beta are rounded to,
+            parameters equal after rounding share results
+
+        :return: Cache, its `stats` gives hit/miss statistics
+        """
+        self.cache = SimulationCache(maxsize, decimals)
+
+        return self.cache
+
+    def disable_cache(self) -> None:
+        """
+        Stop caching simulation results
+        """
+        self.cache = None
+
+    def cache_stats(self) -> dict:
+        """
+        Statistics of the simulation cache
+
+        :return: Numbers of hits, misses and stored results and hit rate
+        """
+        if self.cache is None:
+            return {}
+
+        return self.cache.stats()
+
+    def simulate_batch(
+        self,
+        params_batch: list[ModelParams] | ModelParamsBatch,
+        modeling_duration: int,
+        resolution: str = "day",
+        observed: np.ndarray = None,
+        max_error: float = None,
+    ) -> SimulationResult:
+        """
+        Simulate several parameter sets at once
+
+        Every day of the Baroyan-Rvachev recurrence is advanced for all
+        parameter sets together, `simulate` is a batch of one parameter set.
+
+        :param params_batch: Parameter sets for simulation
+        :param modeling_duration: duration of modeling
+        :param resolution: 'day' keeps all daily series, 'week' keeps only weekly
+            newly infected, summed up during simulation
+        :param observed: Observed newly infected of the resolution, groups one
+            after another, sums of squared errors are stored in `result.error`
+        :param max_error: Simulation stops once sums of squared errors of all
+            parameter sets exceed it, requires observed data
+
+        :return: Results of shape (len(params_batch), GROUPS_NUMBER, series,
+            modeling_duration) or (len(params_batch), GROUPS_NUMBER, 1, weeks)
+        """
+        state = self.initial_state(params_batch)
+
+        if observed is not None:
+            observed = np.asarray(observed, dtype=float).reshape(self.GROUPS_NUMBER, -1)
+
+        if resolution == "week":
+            result = SimulationResult.empty(
+                state.params,
+                self.GROUPS_NUMBER,
+                modeling_duration,
+                series=("newly_infected",),
+                resolution="week",
+            )
+            with profile_phase(self.profiler, "simulate", len(params_batch)):
+                self._run(state, result, observed, max_error)
+
+            return result
+
+        result = SimulationResult.empty(
+            state.params,
+            self.GROUPS_NUMBER,
+            modeling_duration,
+            history=np.zeros_like(state.newly_infected),
+        )
+
+        with profile_phase(self.profiler, "simulate", len(params_batch)):
+            self._run(state, result, observed, max_error)
+
+        np.subtract(
+            state.susceptible[..., None],
+            result.susceptible + result.prevalence,
+            out=result.recovered,
+        )
+
+        return result
+
+    def initial_state(
+        self, params_batch: list[ModelParams] | ModelParamsBatch
+    ) -> SimulationState:
+        """
+        State of the first day of simulation
+
+        :param params_batch: Parameter sets for simulation
+
+        :return: State of the day 0
+        """
+        alpha, _, rho, initial_infectious = self._stack_params(params_batch)
+
+        window = self.kernel.window(initial_infectious.shape)
+        window.push(initial_infectious)
+
+        return SimulationState(
+            day=0,
+            params=ModelParamsBatch.from_params(params_batch),
+            susceptible=np.trunc(alpha * rho),
+            newly_infected=window.values(),
+            recovered=-np.minimum(window.prevalence(), rho),
+        )
+
+    def get_state(self, day: int = None) -> SimulationState:
+        """
+        Snapshot of the last `simulate` call
+
+        :param day: Day of the snapshot, the last simulated day by default
+
+        :return: State of the day with a batch of one parameter set
+        """
+        return self.result.state(day)
+
+    def resume(self, state: SimulationState, extra_days: int) -> SimulationResult:
+        """
+        Continue simulation from the state without recomputing previous days
+
+        :param state: State to continue from
+        :param extra_days: Number of days to simulate after the day of the state
+
+        :return: Results of the days after the day of the state, shape
+            (N, GROUPS_NUMBER, series, extra_days)
+        """
+        result = SimulationResult.empty(
+            state.params, self.GROUPS_NUMBER, extra_days + 1, state.day
+        )
+
+        with profile_phase(self.profiler, "simulate", len(state.params)):
+            self._run(state, result)
+
+        initial_susceptible = (
+            state.recovered + state.susceptible + result.prevalence[..., 0]
+        )
+        np.subtract(
+            initial_susceptible[..., None],
+            result.susceptible + result.prevalence,
+            out=result.recovered,
+        )
+
+        return SimulationResult(
+            result.data[..., 1:], result.params, state.day + 1, state.newly_infected
+        )
+
+    def sensitivities(
+        self, params: ModelParams, modeling_duration: int, resolution: str = "day"
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Newly infected with forward sensitivities to alpha and beta
+
+        Sensitivities are propagated alongside the recurrence, `_transmission`
+        and `_infection` are required to be linear in every argument. Limits
+        by population and susceptible take the derivative of the active branch,
+        truncation of initial susceptible is differentiated as identity.
+        Burnout tolerance is not applied.
+
+        :param params: Model parameters
+        :param modeling_duration: duration of modeling
+        :param resolution: 'day' or 'week', time step of results
+
+        :return: Newly infected of shape (GROUPS_NUMBER, T) and their derivatives
+            by alpha and beta one after another, shape
+            (alpha_dim + beta_dim, GROUPS_NUMBER, T)
+        """
+        alpha, beta, rho, initial_infectious = self._stack_params([params])
+        directions = np.eye(self.alpha_dim + self.beta_dim)
+        # every direction of derivatives is a row of the batch
+        rows = np.zeros(len(directions), dtype=int)
+
+        transmission = self._transmission(beta, rho)[rows]
+        d_transmission = self._transmission(directions[:, self.alpha_dim :], rho[rows])
+        susceptible = np.trunc(alpha * rho)[rows]
+        d_susceptible = directions[:, : self.alpha_dim] * rho
+
+        window = self.kernel.window(susceptible.shape)
+        window.push(initial_infectious[rows])
+        d_window = self.kernel.window(susceptible.shape)
+        d_window.push(np.zeros_like(susceptible))
+
+        newly_infected = np.zeros((self.GROUPS_NUMBER, modeling_duration))
+        d_newly_infected = np.zeros(susceptible.shape + (modeling_duration,))
+        newly_infected[:, 0] = initial_infectious[0]
+
+        # SIMULATION
+        with profile_phase(self.profiler, "simulate", 1):
+            for day in range(modeling_duration - 1):
+                prevalence = window.prevalence()
+                infected = np.minimum(prevalence, rho)
+                d_infected = np.where(prevalence < rho, d_window.prevalence(), 0)
+
+                infection = self._infection(transmission, susceptible, infected)
+                d_infection = (
+                    self._infection(d_transmission, susceptible, infected)
+                    + self._infection(transmission, d_susceptible, infected)
+                    + self._infection(transmission, susceptible, d_infected)
+                )
+                new_infected = np.minimum(infection, susceptible)
+                d_new_infected = np.where(
+                    infection <= susceptible, d_infection, d_susceptible
+                )
+
+                susceptible = susceptible - new_infected
+                d_susceptible = d_susceptible - d_new_infected
+
+                window.push(new_infected)
+                d_window.push(d_new_infected)
+                newly_infected[:, day + 1] = new_infected[0]
+                d_newly_infected[..., day + 1] = d_new_infected
+
+        if resolution == "week":
+            if modeling_duration % 7:
+                raise ValueError("Modeling duration must be a whole number of weeks")
+
+            newly_infected = newly_infected.reshape(self.GROUPS_NUMBER, -1, 7).sum(-1)
+            d_newly_infected = d_newly_infected.reshape(
+                *d_newly_infected.shape[:-1], -1, 7
+            ).sum(-1)
+
+        return newly_infected, d_newly_infected
+
+    def _run(
+        self,
+        state: SimulationState,
+        result: SimulationResult,
+        observed: np.ndarray = None,
+        max_error: float = None,
+    ) -> None:
+        """
+        Advance the Baroyan-Rvachev recurrence from the state
+
+        Once newly infected of the whole kernel window are below
+        `burnout_tolerance` and cannot grow anymore, nobody is infected by
+        the parameter set, and when all parameter sets burn out the rest of
+        the horizon is filled at once. With observed series, squared errors of
+        newly infected are accumulated in `result.error`, simulation stops when
+        errors of all parameter sets exceed the maximal error and
+        `result.stopped_day` is set.
+
+        :param state: State to continue from
+        :param result: Preallocated results to fill in, the first day is the day
+            of the state. Daily recovered are left to the caller, weekly results
+            get newly infected only
+        :param observed: Newly infected of shape (GROUPS_NUMBER, result.duration)
+        :param max_error: Bound of sum of squared errors, no bound by default
+        """
+        _, beta, rho, _ = self._stack_params(state.params)
+        transmission = self._transmission(beta, rho)
+        daily = result.resolution == "day"
+
+        window = self.kernel.window(
+            state.susceptible.shape, state.newly_infected, state.day
+        )
+        # newly infected of the window can't grow if infection of one person
+        # per kernel weight doesn't exceed one
+        kernel_weight = self.kernel.weights.sum(axis=-1).max()
+        unit_infected = np.full(state.susceptible.shape, kernel_weight)
+        burned_out = np.zeros(len(state.params), dtype=bool)
+
+        if daily:
+            susceptible = result.susceptible
+            newly_infected = result.newly_infected
+            total_infected = result.prevalence
+
+            susceptible[..., 0] = state.susceptible
+            newly_infected[..., 0] = state.newly_infected[..., -1]
+            duration = result.duration
+        else:
+            # only the current day and newly infected of the current week are kept
+            current_susceptible = state.susceptible.copy()
+            current_infected = np.empty_like(current_susceptible)
+            week_newly_infected = np.zeros(current_susceptible.shape + (7,))
+            weekly_newly_infected = result.weekly_newly_infected
+
+            week_newly_infected[..., 0] = state.newly_infected[..., -1]
+            duration = result.duration * 7
+
+        if observed is not None:
+            result.error = np.zeros(len(state.params))
+            max_error = np.inf if max_error is None else max_error
+
+            if daily:
+                self._add_error(result.error, newly_infected[..., 0], observed[:, 0])
+
+        # SIMULATION
+        for day in range(duration - 1):
+            if daily:
+                current_susceptible = susceptible[..., day]
+                current_infected = total_infected[..., day]
+                new_infected = newly_infected[..., day + 1]
+            else:
+                new_infected = week_newly_infected[..., (day + 1) % 7]
+
+            if (state.day + day) % window.length == 0:
+                burned_out |= (
+                    window.buffer.max(axis=(-2, -1)) <= self.burnout_tolerance
+                ) & (
+                    self._infection(transmission, current_susceptible, unit_infected).max(
+                        axis=-1
+                    )
+                    <= 1
+                )
+
+            if burned_out.all():
+                if daily:
+                    self._fill_burnout(window, rho, result, day)
+                elif day % 7 != 6:
+                    week_newly_infected[..., day % 7 + 1 :] = 0
+                    week_newly_infected.sum(
+                        axis=-1, out=weekly_newly_infected[..., day // 7]
+                    )
+
+                break
+
+            np.minimum(window.prevalence(), rho, out=current_infected)
+            np.minimum(
+                self._infection(transmission, current_susceptible, current_infected),
+                current_susceptible,
+                out=new_infected,
+            )
 
-    def simulate(self, params: ModelParams, modeling_duration: int):
-        pass
+            if burned_out.any():
+                new_infected[burned_out] = 0
+
+            if daily:
+                np.subtract(
+                    current_susceptible, new_infected, out=susceptible[..., day + 1]
+                )
+            else:
+                np.subtract(current_susceptible, new_infected, out=current_susceptible)
+
+                if (day + 1) % 7 == 6:
+                    week_newly_infected.sum(
+                        axis=-1, out=weekly_newly_infected[..., (day + 1) // 7]
+                    )
+
+            window.push(new_infected)
+
+            if observed is not None:
+                if daily:
+                    step = day + 1
+                elif (day + 1) % 7 == 6:
+                    step = (day + 1) // 7
+                else:
+                    continue
+
+                self._add_error(
+                    result.error,
+                    (
+                        result.newly_infected[..., step]
+                        if daily
+                        else weekly_newly_infected[..., step]
+                    ),
+                    observed[:, step],
+                )
+
+                if result.error.min() > max_error:
+                    result.stopped_day = state.day + day + 1
+
+                    return
+        else:
+            if daily:
+                np.minimum(window.prevalence(), rho, out=total_infected[..., -1])
+
+        if observed is not None:
+            # errors of the days after burnout are added here
+            simulated = newly_infected if daily else weekly_newly_infected
+            result.error = ((simulated - observed) ** 2).sum(axis=(-2, -1))
+
+    @staticmethod
+    def _add_error(error: np.ndarray, simulated: np.ndarray, observed: np.ndarray):
+        error += ((simulated - observed) ** 2).sum(axis=-1)
+
+    def _fill_burnout(self, window, rho, result: SimulationResult, day: int) -> None:
+        """
+        Fill daily results after the day of burnout, nobody is infected anymore
+
+        :param window: Kernel window of the day
+        :param rho: Numbers of people in simulation of shape (N, 1)
+        :param result: Results filled up to the day
+        :param day: Index of the day of burnout in the results
+        """
+        result.susceptible[..., day + 1 :] = result.susceptible[..., day, None]
+        result.newly_infected[..., day + 1 :] = 0
+        result.prevalence[..., day:] = 0
+        no_infected = np.zeros(result.susceptible.shape[:-1])
+
+        # prevalence of the window decays to zero in kernel length days
+        for current_day in range(day, min(day + window.length, result.duration)):
+            np.minimum(window.prevalence(), rho, out=result.prevalence[..., current_day])
+            window.push(no_infected)
+
+    def _transmission(self, beta: np.ndarray, rho: np.ndarray) -> np.ndarray:
+        """
+        Transmission coefficients, computed once per simulation
+
+        :param beta: Effective contacts intensivity of shape (N, beta_dim)
+        :param rho: Numbers of people in simulation of shape (N, 1)
+
+        :return: Coefficients consumed by `_infection`
+        """
+        raise NotImplementedError
+
+    def _infection(
+        self,
+        transmission: np.ndarray,
+        susceptible: np.ndarray,
+        prevalence: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Newly infected people of the next day before limiting by susceptible
+
+        :param transmission: Transmission coefficients from `_transmission`
+        :param susceptible: Susceptible people of shape (N, GROUPS_NUMBER)
+        :param prevalence: Infected people of shape (N, GROUPS_NUMBER)
+
+        :return: Newly infected people of shape (N, GROUPS_NUMBER)
+        """
+        return transmission * susceptible * prevalence
+
+    def _stack_params(self, params_batch: list[ModelParams] | ModelParamsBatch):
+        """
+        Convert parameter sets into arrays with parameter set as the first axis
+
+        :param params_batch: Parameter sets
+
+        :return: alpha, beta, population size and initial infectious arrays
+        """
+        batch = ModelParamsBatch.from_params(params_batch)
+
+        return (
+            batch.alpha[:, : self.alpha_dim],
+            batch.beta[:, : self.beta_dim],
+            batch.population_size[:, None].astype(float),
+            batch.initial_infectious[:, : self.GROUPS_NUMBER],
+        )
 
     def br_function(self, day: int) -> int:
         """
@@ -35,9 +559,9 @@ class Model:
         :return: human virulence
         """
 
-        if day >= len(self.br_func_array):
+        if day >= len(self.kernel):
             return 0
-        return self.br_func_array[day]
+        return self.kernel.weights[..., day]
 
     def params(self):
         """
@@ -46,47 +570,49 @@ class Model:
         return (self.alpha_dim, self.beta_dim)
 
     def get_daily_newly_infected(self):
-        return self.newly_infected
+        return self.result.flat("newly_infected", weekly=False)
 
     def get_daily_newly_infected_by_group(self):
-        return np.array_split(self.newly_infected, self.GROUPS_NUMBER)
+        return self.result.newly_infected
 
     def get_weekly_newly_infected(self):
-        return np.array(self.newly_infected).reshape(-1, 7).sum(axis=1)
+        return self.result.flat("newly_infected", weekly=True)
 
     def get_weekly_newly_infected_by_group(self):
-        return self.get_weekly_newly_infected().reshape(self.alpha_dim, -1)
+        return self.result.weekly_newly_infected
 
     def get_daily_prevalence(self):
-        return self.prevalence
+        return self.result.flat("prevalence", weekly=False)
 
     def get_daily_prevalence_by_group(self):
-        return np.array_split(self.prevalence, self.GROUPS_NUMBER)
+        return self.result.prevalence
 
     def get_weekly_prevalence(self):
-        return np.array(self.prevalence).reshape(-1, 7).sum(axis=1)
+        return self.result.flat("prevalence", weekly=True)
 
     def get_weekly_prevalence_by_group(self):
-        return self.get_weekly_prevalence().reshape(self.alpha_dim, -1)
+        return self.result.weekly_prevalence
 
     def get_daily_recovered(self):
-        return self.recovered
+        return self.result.flat("recovered", weekly=False)
 
     def get_daily_recovered_by_group(self):
-        return np.array_split(self.recovered, self.GROUPS_NUMBER)
+        return self.result.recovered
 
     def get_weekly_recovered(self):
-        return np.array(self.recovered).reshape(-1, 7).sum(axis=1)
+        return self.result.flat("recovered", weekly=True)
 
     def get_weekly_recovered_by_group(self):
-        return self.get_weekly_recovered().reshape(self.alpha_dim, -1)
+        return self.result.weekly_recovered
 
     def set_best_params(self, best_params: ModelParams):
         self.calibration_params = best_params
+        self.calibration_result = None
         self.is_calibrated = True
 
-    def set_ci_params(self, ci_params: list[ModelParams]):
-        self.ci_params = ci_params
+    def set_ci_params(self, ci_params: list[ModelParams] | ModelParamsBatch):
+        self.ci_params = ModelParamsBatch.from_params(ci_params)
+        self.calibration_result = None
         self.is_ci_ready = True
 
     def get_best_params(self) -> ModelParams:
@@ -96,6 +622,9 @@ class Model:
             raise Exception("Model is not calibrated!")
 
     def get_ci_params(self) -> list[ModelParams]:
+        return self.get_ci_params_batch().to_list()
+
+    def get_ci_params_batch(self) -> ModelParamsBatch:
         if self.is_ci_ready:
             return self.ci_params
         else:
@@ -0,0 +1,130 @@
+import numpy as np
+
+
+class BRKernel:
+    """
+    Infectivity kernel of the Baroyan-Rvachev model
+
+    Holds human virulence by illness day as a precomputed weight vector,
+    so prevalence of a day is a single dot product with the window of
+    the last newly infected.
+    """
+
+    br_func_array = [0.1, 0.1, 1, 0.9, 0.55, 0.3, 0.15, 0.05]
+
+    def __init__(self, profile: list[float] | list[list[float]] = None):
+        """
+        Infectivity kernel of the Baroyan-Rvachev model
+
+        :param profile: Human virulence by illness day. Either one profile for all
+            groups or one profile per group (strain); shorter profiles are padded
+            with zeros
+        """
+        profile = self.br_func_array if profile is None else profile
+
+        if np.ndim(profile[0]) == 0:
+            weights = np.array(profile, dtype=float)
+        else:
+            weights = np.zeros((len(profile), max(len(p) for p in profile)))
+
+            for i, group_profile in enumerate(profile):
+                weights[i, : len(group_profile)] = group_profile
+
+        weights.flags.writeable = False
+
+        self.weights = weights
+        # weights for every position of the latest day in the circular window:
+        # _rotations[p][..., m] is virulence of the day stored at index m
+        self._rotations = np.stack(
+            [
+                np.roll(weights[..., ::-1], position + 1, axis=-1)
+                for position in range(weights.shape[-1])
+            ]
+        )
+        self._rotations.flags.writeable = False
+
+    def __len__(self) -> int:
+        return self.weights.shape[-1]
+
+    def window(
+        self, shape: tuple[int, ...], newly_infected: np.ndarray = None, day: int = 0
+    ) -> "KernelWindow":
+        """
+        Create rolling window
+
+        :param shape: Shape of newly infected of one day, e.g. (N, groups)
+        :param newly_infected: Newly infected of the previous days with the latest
+            day last, empty window by default
+        :param day: Day of the latest newly infected
+
+        :return: Rolling window of the kernel length
+        """
+        return KernelWindow(self, shape, newly_infected, day)
+
+
+class KernelWindow:
+    """
+    Rolling window of the last newly infected of the kernel length
+
+    Window is stored as a circular buffer, so a new day costs one write
+    and no shifting of the stored days.
+    """
+
+    def __init__(
+        self,
+        kernel: BRKernel,
+        shape: tuple[int, ...],
+        newly_infected: np.ndarray = None,
+        day: int = 0,
+    ):
+        """
+        Rolling window of the last newly infected of the kernel length
+
+        :param kernel: Infectivity kernel
+        :param shape: Shape of newly infected of one day, e.g. (N, groups)
+        :param newly_infected: Newly infected of the previous days with the latest
+            day last, empty window by default
+        :param day: Day of the latest newly infected
+        """
+        self.kernel = kernel
+        self.length = len(kernel)
+        self.buffer = np.zeros(tuple(shape) + (self.length,))
+        # index of the latest day in the buffer, the day 0 is stored at index 0,
+        # so restored windows sum the days in the same order as uninterrupted ones
+        self.position = (day - 1) % self.length
+
+        if newly_infected is not None:
+            days = min(self.length, newly_infected.shape[-1])
+            self.buffer[..., self.length - days :] = newly_infected[..., -days:]
+            self.position = day % self.length
+            self.buffer = np.roll(self.buffer, self.position + 1, axis=-1)
+
+    def push(self, newly_infected: np.ndarray) -> None:
+        """
+        Add newly infected of the next day, forgetting the oldest day
+
+        :param newly_infected: Newly infected of one day
+        """
+        self.position = (self.position + 1) % self.length
+        self.buffer[..., self.position] = newly_infected
+
+    def values(self) -> np.ndarray:
+        """
+        Newly infected of the window in chronological order
+
+        :return: Array with the latest day last
+        """
+        return np.roll(self.buffer, self.length - 1 - self.position, axis=-1)
+
+    def prevalence(self) -> np.ndarray:
+        """
+        Infected people of the latest day
+
+        :return: Sum of newly infected weighted by virulence of their illness day
+        """
+        weights = self.kernel._rotations[self.position]
+
+        if weights.ndim == 1:
+            return self.buffer @ weights
+
+        return (self.buffer * weights).sum(axis=-1)
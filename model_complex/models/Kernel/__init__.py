@@ -0,0 +1,3 @@
+from .BRKernel import BRKernel, KernelWindow
+
+__all__ = ["BRKernel", "KernelWindow"]
@@ -0,0 +1,30 @@
+from ..Interface import Model
+from ..Kernel import BRKernel
+
+
+class ContactMatrixBRModel(Model):
+
+    def __init__(self, groups_number: int = 4, kernel: BRKernel = None):
+        """
+        Model for arbitrary number of groups coupled by a contact matrix
+
+        beta[G * i + j] is intensivity of contacts of infected people of group i
+        with susceptible people of group j
+
+        :param groups_number: Number of groups
+        :param kernel: Infectivity kernel, Baroyan-Rvachev function by default
+        """
+        super().__init__(kernel)
+        self.GROUPS_NUMBER = groups_number
+        self.alpha_dim = groups_number
+        self.beta_dim = groups_number**2
+
+    def _transmission(self, beta, rho):
+        contacts = beta.reshape((-1, self.GROUPS_NUMBER, self.GROUPS_NUMBER))
+
+        return contacts / rho[..., None]
+
+    def _infection(self, transmission, susceptible, prevalence):
+        # prevalence of source groups times the contact matrix, batched matrix
+        # product of NumPy and PyTensor alike
+        return susceptible * (prevalence[:, None, :] @ transmission)[:, 0]
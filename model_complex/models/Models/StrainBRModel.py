@@ -0,0 +1,26 @@
+from ..Interface import Model
+from ..Kernel import BRKernel
+
+
+class StrainBRModel(Model):
+
+    def __init__(self, strains_number: int = 4, kernel: BRKernel = None):
+        """
+        Model for several strains spreading in the same population
+
+        Strains are independent and simulated together as groups: alpha[i] is
+        the fraction of population susceptible to strain i and beta[i] is
+        intensivity of contacts for strain i
+
+        :param strains_number: Number of strains
+        :param kernel: Infectivity kernel, Baroyan-Rvachev function by default.
+            Kernel with a profile per strain gives every strain its own
+            infectivity
+        """
+        super().__init__(kernel)
+        self.GROUPS_NUMBER = strains_number
+        self.alpha_dim = strains_number
+        self.beta_dim = strains_number
+
+    def _transmission(self, beta, rho):
+        return beta / rho
@@ -1,4 +1,6 @@
 from .AgeGroupBRModel import AgeGroupBRModel
+from .ContactMatrixBRModel import ContactMatrixBRModel
+from .StrainBRModel import StrainBRModel
 from .TotalBRModel import TotalBRModel
 
-__all__ = ["AgeGroupBRModel", "TotalBRModel"]
+__all__ = ["AgeGroupBRModel", "ContactMatrixBRModel", "StrainBRModel", "TotalBRModel"]
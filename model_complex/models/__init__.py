@@ -1,4 +1,5 @@
 from .FactoryModel import FactoryModel
 from .Interface import Model
+from .Kernel import BRKernel
 
-__all__ = ["FactoryModel", "Model"]
+__all__ = ["FactoryModel", "Model", "BRKernel"]
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class ModelParams:
@@ -16,3 +18,99 @@ class ModelParams:
     beta: list[float]
     population_size: int
     initial_infectious: list[float]
+
+    def freeze(self, decimals: int = None) -> "FrozenModelParams":
+        """
+        Hashable copy of parameters
+
+        :param decimals: Number of decimals to round alpha and beta to,
+            no rounding by default
+
+        :return: Frozen parameters
+        """
+        alpha = np.asarray(self.alpha, dtype=float)
+        beta = np.asarray(self.beta, dtype=float)
+
+        if decimals is not None:
+            alpha = alpha.round(decimals)
+            beta = beta.round(decimals)
+
+        return FrozenModelParams(
+            alpha=alpha,
+            beta=beta,
+            population_size=int(self.population_size),
+            initial_infectious=self.initial_infectious,
+        )
+
+
+@dataclass(frozen=True, eq=False)
+class FrozenModelParams:
+    """
+    Immutable and hashable model parameters, accepted wherever `ModelParams` is
+
+    Parameters are stored as read-only copies of arrays, equality and hash
+    compare their bytes.
+
+    :param alpha: Fraction of non-immune people
+    :param beta: Effective contacts intensivity
+    :param population_size: Numbers of people in simulation
+    :param initial_infectious: Numbers of initial infected people in the simulation
+    """
+
+    alpha: np.ndarray
+    beta: np.ndarray
+    population_size: int
+    initial_infectious: np.ndarray
+
+    def __post_init__(self) -> None:
+        for name in ("alpha", "beta", "initial_infectious"):
+            values = np.array(getattr(self, name), dtype=float).ravel()
+            values.flags.writeable = False
+            object.__setattr__(self, name, values)
+
+        object.__setattr__(
+            self,
+            "_key",
+            (
+                self.alpha.tobytes(),
+                self.beta.tobytes(),
+                self.population_size,
+                self.initial_infectious.tobytes(),
+            ),
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FrozenModelParams):
+            return NotImplemented
+
+        return self._key == other._key
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def freeze(self, decimals: int = None) -> "FrozenModelParams":
+        """
+        Hashable copy of parameters
+
+        :param decimals: Number of decimals to round alpha and beta to,
+            no rounding by default
+
+        :return: Frozen parameters
+        """
+        if decimals is None:
+            return self
+
+        return self.thaw().freeze(decimals)
+
+    def thaw(self) -> ModelParams:
+        """
+        Mutable copy of parameters
+
+        :return: Parameters with lists
+        """
+        return ModelParams(
+            alpha=self.alpha.tolist(),
+            beta=self.beta.tolist(),
+            population_size=self.population_size,
+            initial_infectious=self.initial_infectious.tolist(),
+        )
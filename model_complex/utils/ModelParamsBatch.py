@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from .ModelParams import ModelParams
+
+
+@dataclass(eq=False)
+class ModelParamsBatch:
+    """
+    Parameter sets stored as arrays with parameter set as the first axis
+
+    Batch is a sequence of `ModelParams`: indexing by an integer and iteration
+    give parameter sets, indexing by a slice, mask or indices gives a batch.
+    Models simulate batches without converting them to lists.
+
+    :param alpha: Fractions of non-immune people, shape (N, alpha_dim)
+    :param beta: Effective contacts intensivities, shape (N, beta_dim)
+    :param population_size: Numbers of people in simulation, shape (N,)
+    :param initial_infectious: Numbers of initial infected people,
+        shape (N, groups)
+    """
+
+    alpha: np.ndarray
+    beta: np.ndarray
+    population_size: np.ndarray
+    initial_infectious: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.population_size = np.asarray(self.population_size, dtype=int).reshape(-1)
+        size = len(self.population_size)
+
+        self.alpha = _rows(self.alpha, size)
+        self.beta = _rows(self.beta, size)
+        self.initial_infectious = _rows(self.initial_infectious, size)
+
+    @classmethod
+    def from_params(
+        cls, params_batch: "list[ModelParams] | ModelParamsBatch"
+    ) -> "ModelParamsBatch":
+        """
+        Batch of parameter sets
+
+        :param params_batch: Parameter sets, a batch is returned as it is
+
+        :return: Batch
+        """
+        if isinstance(params_batch, cls):
+            return params_batch
+
+        if not len(params_batch):
+            return cls(np.empty((0, 0)), np.empty((0, 0)), [], np.empty((0, 0)))
+
+        return cls(
+            alpha=[np.asarray(params.alpha, dtype=float) for params in params_batch],
+            beta=[np.asarray(params.beta, dtype=float) for params in params_batch],
+            population_size=[params.population_size for params in params_batch],
+            initial_infectious=[
+                np.asarray(params.initial_infectious, dtype=float)
+                for params in params_batch
+            ],
+        )
+
+    @classmethod
+    def from_points(
+        cls, model_params: ModelParams, alpha: np.ndarray, beta: np.ndarray
+    ) -> "ModelParamsBatch":
+        """
+        Batch of alpha and beta with population of the model parameters
+
+        :param model_params: Parameters of model, population size and initial
+            infectious are shared by the batch
+        :param alpha: Alpha of shape (N, alpha_dim)
+        :param beta: Beta of shape (N, beta_dim)
+
+        :return: Batch
+        """
+        alpha = np.asarray(alpha, dtype=float)
+        size = len(alpha)
+
+        return cls(
+            alpha=alpha,
+            beta=beta,
+            population_size=np.full(size, model_params.population_size),
+            initial_infectious=np.tile(
+                np.asarray(model_params.initial_infectious, dtype=float), (size, 1)
+            ),
+        )
+
+    @classmethod
+    def concatenate(
+        cls, batches: "list[list[ModelParams] | ModelParamsBatch]"
+    ) -> "ModelParamsBatch":
+        """
+        Parameter sets of several batches one after another
+
+        :param batches: Batches or lists of parameter sets, empty ones are skipped
+
+        :return: Batch
+        """
+        batches = [cls.from_params(batch) for batch in batches if len(batch)]
+
+        if not batches:
+            return cls.from_params([])
+
+        return cls(
+            alpha=np.concatenate([batch.alpha for batch in batches]),
+            beta=np.concatenate([batch.beta for batch in batches]),
+            population_size=np.concatenate([batch.population_size for batch in batches]),
+            initial_infectious=np.concatenate(
+                [batch.initial_infectious for batch in batches]
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.population_size)
+
+    def __getitem__(self, index) -> "ModelParams | ModelParamsBatch":
+        """
+        Parameter set of an integer index, batch of a slice, mask or indices
+
+        :param index: Index of the batch
+
+        :return: Parameter set or batch sharing the arrays if possible
+        """
+        if isinstance(index, (int, np.integer)):
+            return ModelParams(
+                alpha=self.alpha[index],
+                beta=self.beta[index],
+                population_size=int(self.population_size[index]),
+                initial_infectious=self.initial_infectious[index],
+            )
+
+        return ModelParamsBatch(
+            alpha=self.alpha[index],
+            beta=self.beta[index],
+            population_size=self.population_size[index],
+            initial_infectious=self.initial_infectious[index],
+        )
+
+    def __iter__(self) -> Iterator[ModelParams]:
+        return (self[i] for i in range(len(self)))
+
+    def to_list(self) -> list[ModelParams]:
+        """
+        Parameter sets of the batch
+
+        :return: List of parameter sets
+        """
+        return list(self)
+
+    def save(self, path: str) -> None:
+        """
+        Save batch to NumPy .npz file
+
+        :param path: Path to file
+        """
+        np.savez(
+            path,
+            alpha=self.alpha,
+            beta=self.beta,
+            population_size=self.population_size,
+            initial_infectious=self.initial_infectious,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ModelParamsBatch":
+        """
+        Load batch saved by `save`
+
+        :param path: Path to file
+
+        :return: Batch
+        """
+        with np.load(path) as arrays:
+            return cls(
+                alpha=arrays["alpha"],
+                beta=arrays["beta"],
+                population_size=arrays["population_size"],
+                initial_infectious=arrays["initial_infectious"],
+            )
+
+
+def _rows(values, size: int) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+
+    if values.ndim == 2 and len(values) == size:
+        return values
+
+    return values.reshape(size, -1)
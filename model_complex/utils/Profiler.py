@@ -0,0 +1,133 @@
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from threading import Lock, local
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class Profiler:
+    """
+    Opt-in instrumentation of calibration and forecast
+
+    Time of a phase includes its nested phases, own time excludes them.
+    Simulations are counted by parameter sets. Simulations of worker processes
+    (Optuna and ABC-SMC with several workers) are not counted.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, dict] = {}
+        self.simulations = 0
+        self.start = time.perf_counter()
+
+        self._lock = Lock()
+        # nested time of open phases, every thread has its own stack
+        self._local = local()
+
+    def __getstate__(self) -> dict:
+        # lock and thread-local stack are not picklable, copies get their own
+        state = self.__dict__.copy()
+        del state["_lock"], state["_local"]
+
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+        self._local = local()
+
+    @contextmanager
+    def phase(self, name: str, simulations: int = 0):
+        """
+        Time the block as a phase
+
+        :param name: Name of phase
+        :param simulations: Number of parameter sets simulated in the block
+        """
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            nested = stack.pop()
+
+            if stack:
+                stack[-1] += seconds
+
+            with self._lock:
+                stats = self.phases.setdefault(
+                    name,
+                    {"calls": 0, "seconds": 0.0, "own_seconds": 0.0, "simulations": 0},
+                )
+                stats["calls"] += 1
+                stats["seconds"] += seconds
+                stats["own_seconds"] += seconds - nested
+                stats["simulations"] += simulations
+                self.simulations += simulations
+
+    def report(self) -> dict:
+        """
+        Structured report of the profiled run
+
+        :return: Wall-clock seconds since creation, number of simulations,
+            simulations per second of wall-clock time and of simulation time,
+            peak resident memory of the process in megabytes and statistics
+            of phases (calls, seconds, own seconds, simulations)
+        """
+        seconds = time.perf_counter() - self.start
+        simulation_seconds = sum(
+            stats["own_seconds"] for stats in self.phases.values() if stats["simulations"]
+        )
+
+        return {
+            "seconds": seconds,
+            "simulations": self.simulations,
+            "simulations_per_second": self.simulations / seconds if seconds else 0.0,
+            "simulator_throughput": (
+                self.simulations / simulation_seconds if simulation_seconds else 0.0
+            ),
+            "peak_memory_mb": _peak_memory_mb(),
+            "phases": {name: dict(stats) for name, stats in self.phases.items()},
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Save report to JSON file
+
+        :param path: Path to file
+        """
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+def profile_phase(profiler: Profiler, name: str, simulations: int = 0):
+    """
+    Phase of the profiler, nothing is measured without profiler
+
+    :param profiler: Profiler or None
+    :param name: Name of phase
+    :param simulations: Number of parameter sets simulated in the block
+
+    :return: Context manager
+    """
+    if profiler is None:
+        return nullcontext()
+
+    return profiler.phase(name, simulations)
+
+
+def _peak_memory_mb() -> float | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable
+
+import numpy as np
+
+from .ModelParams import ModelParams
+from .SimulationResult import SimulationResult
+
+
+class SimulationCache:
+    """
+    Size-bounded cache of simulation results with LRU eviction
+
+    Results are keyed by model type, parameters, duration, resolution, kernel
+    weights and burnout tolerance. Other attributes of models, e.g. contact
+    matrices, are not part of the key, so one cache serves one model. With
+    rounding tolerance, parameters equal after rounding share the results
+    of the first simulated one. Cached arrays are read-only.
+    """
+
+    def __init__(self, maxsize: int = 1024, decimals: int = None):
+        """
+        Size-bounded cache of simulation results with LRU eviction
+
+        :param maxsize: Maximal number of stored results
+        :param decimals: Number of decimals alpha and beta are rounded to
+            in keys, no rounding by default
+        """
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+
+        self._results: OrderedDict[Hashable, SimulationResult] = OrderedDict()
+        self._lock = Lock()
+
+    def __getstate__(self) -> dict:
+        # lock is not picklable, copies get their own one
+        state = self.__dict__.copy()
+        del state["_lock"]
+
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def key(
+        self,
+        model_type: str,
+        params: ModelParams,
+        duration: int,
+        resolution: str,
+        kernel_weights: np.ndarray = None,
+        burnout_tolerance: float = None,
+    ) -> Hashable:
+        """
+        Key of the simulation
+
+        :param model_type: Name of model class
+        :param params: Model parameters
+        :param duration: Modeling duration
+        :param resolution: Resolution of results
+        :param kernel_weights: Weights of the infectivity kernel of the model
+        :param burnout_tolerance: Burnout tolerance of the model
+
+        :return: Hashable key
+        """
+        if kernel_weights is not None:
+            kernel_weights = kernel_weights.shape, kernel_weights.tobytes()
+
+        return (
+            model_type,
+            params.freeze(self.decimals),
+            duration,
+            resolution,
+            kernel_weights,
+            burnout_tolerance,
+        )
+
+    def get_or_simulate(
+        self, key: Hashable, simulate: Callable[[], SimulationResult]
+    ) -> SimulationResult:
+        """
+        Cached results of the key, simulated and stored on a miss
+
+        :param key: Key from `key`
+        :param simulate: Function simulating results of the key
+
+        :return: Results of simulation
+        """
+        with self._lock:
+            result = self._results.get(key)
+
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+
+                return result
+
+            self.misses += 1
+
+        result = simulate()
+        result.data.flags.writeable = False
+
+        with self._lock:
+            self._results[key] = result
+
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+        return result
+
+    def stats(self) -> dict:
+        """
+        Statistics of the cache
+
+        :return: Numbers of hits, misses and stored results and hit rate
+        """
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._results),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def clear(self) -> None:
+        """
+        Remove all results and reset statistics
+        """
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,230 @@
+from functools import cached_property
+
+import numpy as np
+
+from .ModelParams import ModelParams
+from .ModelParamsBatch import ModelParamsBatch
+from .SimulationState import SimulationState
+
+
+class SimulationResult:
+    """
+    Results of simulation stored in a single contiguous array
+
+    Array has shape (groups, series, days) for one parameter set and
+    (N, groups, series, days) for a batch of parameter sets. Daily series
+    are views of the array, weekly series are summed up once on the first access.
+    Results of 'week' resolution are summed up during simulation and store
+    weeks instead of days.
+    """
+
+    SERIES = ("susceptible", "newly_infected", "prevalence", "recovered")
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        params: ModelParams | list[ModelParams] | ModelParamsBatch,
+        start_day: int = 0,
+        history: np.ndarray = None,
+        series: tuple[str, ...] = SERIES,
+        resolution: str = "day",
+    ):
+        """
+        Results of simulation stored in a single contiguous array
+
+        :param data: Array of shape ([N,] groups, series, days)
+        :param params: Parameter set or parameter sets of a batch
+        :param start_day: Day of the first element of the series
+        :param history: Newly infected of the kernel-length days before
+            the start day, shape ([N,] groups, kernel length)
+        :param series: Names of the stored series
+        :param resolution: 'day' or 'week', time step of the stored series
+
+        Results simulated against observed data have `error`, the sums of squared
+        errors of newly infected, and `stopped_day`, the day simulation stopped
+        at when all errors exceeded the maximal error. Series after the day are
+        left zero.
+        """
+        self.data = data
+        self.params = params
+        self.start_day = start_day
+        self.history = history
+        self.series = series
+        self.resolution = resolution
+        self.error: np.ndarray = None
+        self.stopped_day: int = None
+
+    @classmethod
+    def empty(
+        cls,
+        params_batch: list[ModelParams] | ModelParamsBatch,
+        groups_number: int,
+        duration: int,
+        start_day: int = 0,
+        history: np.ndarray = None,
+        series: tuple[str, ...] = SERIES,
+        resolution: str = "day",
+    ) -> "SimulationResult":
+        """
+        Preallocate results of a batch
+
+        :param params_batch: Parameter sets of the batch
+        :param groups_number: Number of groups
+        :param duration: Number of simulated days
+        :param start_day: Day of the first element of the series
+        :param history: Newly infected of the kernel-length days before
+            the start day, shape (N, groups, kernel length)
+        :param series: Names of the stored series
+        :param resolution: 'day' or 'week', time step of the stored series
+
+        :return: Results filled with zeros
+        """
+        if resolution == "week":
+            if duration % 7:
+                raise ValueError("Modeling duration must be a whole number of weeks")
+
+            duration //= 7
+
+        data = np.zeros((len(params_batch), groups_number, len(series), duration))
+
+        return cls(
+            data,
+            ModelParamsBatch.from_params(params_batch),
+            start_day,
+            history,
+            series,
+            resolution,
+        )
+
+    def __len__(self) -> int:
+        return len(self.params)
+
+    def __getitem__(self, index: int | slice) -> "SimulationResult":
+        """
+        Results of the parameter set (sets) of a batch, sharing the array
+
+        :param index: Index or slice of the batch
+
+        :return: Results of the selected parameter sets
+        """
+        result = SimulationResult(
+            self.data[index],
+            self.params[index],
+            self.start_day,
+            None if self.history is None else self.history[index],
+            self.series,
+            self.resolution,
+        )
+        result.error = None if self.error is None else self.error[index]
+        result.stopped_day = self.stopped_day
+
+        return result
+
+    @property
+    def duration(self) -> int:
+        return self.data.shape[-1]
+
+    @property
+    def groups_number(self) -> int:
+        return self.data.shape[-3]
+
+    def _daily(self, series: str) -> np.ndarray:
+        if self.resolution != "day" or series not in self.series:
+            raise ValueError(f"Daily {series} is not stored in the results")
+
+        return self.data[..., self.series.index(series), :]
+
+    def _weekly(self, series: str) -> np.ndarray:
+        if series not in self.series:
+            raise ValueError(f"Weekly {series} is not stored in the results")
+
+        return self.weekly[..., self.series.index(series), :]
+
+    @cached_property
+    def susceptible(self) -> np.ndarray:
+        return self._daily("susceptible")
+
+    @cached_property
+    def newly_infected(self) -> np.ndarray:
+        return self._daily("newly_infected")
+
+    @cached_property
+    def prevalence(self) -> np.ndarray:
+        return self._daily("prevalence")
+
+    @cached_property
+    def recovered(self) -> np.ndarray:
+        return self._daily("recovered")
+
+    @cached_property
+    def weekly(self) -> np.ndarray:
+        """
+        Weekly sums of all series, shape ([N,] groups, series, weeks)
+        """
+        if self.resolution == "week":
+            return self.data
+
+        return self.data.reshape(*self.data.shape[:-1], -1, 7).sum(axis=-1)
+
+    @cached_property
+    def weekly_newly_infected(self) -> np.ndarray:
+        return self._weekly("newly_infected")
+
+    @cached_property
+    def weekly_prevalence(self) -> np.ndarray:
+        return self._weekly("prevalence")
+
+    @cached_property
+    def weekly_recovered(self) -> np.ndarray:
+        return self._weekly("recovered")
+
+    def flat(self, series: str, weekly: bool = None) -> np.ndarray:
+        """
+        Series of all groups one after another, as observed data is stored
+
+        :param series: Name of series from `SERIES`
+        :param weekly: Weekly sums instead of daily values, resolution
+            of the results by default
+
+        :return: Array of shape ([N,] groups * days)
+        """
+        weekly = self.resolution == "week" if weekly is None else weekly
+        key = f"_flat_{'weekly_' if weekly else ''}{series}"
+
+        if key not in self.__dict__:
+            values = getattr(self, f"weekly_{series}" if weekly else series)
+            self.__dict__[key] = values.reshape(*values.shape[:-2], -1)
+
+        return self.__dict__[key]
+
+    def state(self, day: int = None) -> SimulationState:
+        """
+        Snapshot of simulation to continue it with `Model.resume`
+
+        :param day: Day of the snapshot, the last simulated day by default
+
+        :return: State of the day, always with a batch axis
+        """
+        if self.resolution != "day" or self.history is None:
+            raise ValueError("Snapshot requires daily results of the whole window")
+
+        day = self.start_day + self.duration - 1 if day is None else day
+        index = day - self.start_day
+        batch = self
+
+        if self.data.ndim == 3:
+            batch = SimulationResult(
+                self.data[None], [self.params], self.start_day, self.history[None]
+            )
+
+        newly_infected = np.concatenate(
+            [batch.history, batch.newly_infected[..., : index + 1]], axis=-1
+        )
+
+        return SimulationState(
+            day=day,
+            params=batch.params,
+            susceptible=batch.susceptible[..., index].copy(),
+            newly_infected=newly_infected[..., -batch.history.shape[-1] :],
+            recovered=batch.recovered[..., index].copy(),
+        )
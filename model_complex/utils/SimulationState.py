@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .ModelParams import ModelParams
+from .ModelParamsBatch import ModelParamsBatch
+
+
+@dataclass
+class SimulationState:
+    """
+    Snapshot of simulation at the end of a day, enough to continue it
+
+    :param day: Day of the snapshot
+    :param params: Parameter sets of the simulation
+    :param susceptible: Susceptible people of shape (N, groups)
+    :param newly_infected: Newly infected people of the last kernel-length days,
+        the latest day is the last one, shape (N, groups, kernel length)
+    :param recovered: Recovered people of shape (N, groups)
+    """
+
+    day: int
+    params: list[ModelParams] | ModelParamsBatch
+    susceptible: np.ndarray
+    newly_infected: np.ndarray
+    recovered: np.ndarray
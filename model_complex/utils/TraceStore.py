@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import xarray as xr
+
+from .ModelParams import ModelParams
+from .WarmStart import WarmStart
+
+
+class TraceStore:
+    """
+    Posterior trace persisted chain by chain to netCDF files
+
+    Sampling is resumed by skipping chains already stored in the directory.
+    Draws are read lazily, only the selected ones are loaded from disk.
+    """
+
+    def __init__(self, directory: str, config: dict = None):
+        """
+        Posterior trace persisted chain by chain to netCDF files
+
+        :param directory: Directory of chain files, created if missing
+        :param config: Settings of the run, chains of a run with other settings
+            are rejected
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.config = json.dumps(config or {}, sort_keys=True, default=str)
+
+    @staticmethod
+    def fingerprint(
+        model,
+        data: np.ndarray,
+        model_params: ModelParams,
+        warm_start: WarmStart = None,
+        **settings,
+    ) -> dict:
+        """
+        Config of a calibration run, chains of another data, model or prior
+        are rejected as chains of other settings
+
+        :param model: Calibrated model
+        :param data: Observed data
+        :param model_params: Parameters of model
+        :param warm_start: Previous results the run starts from
+        :param settings: Settings of the sampler and of the prior
+
+        :return: Config for `TraceStore`
+        """
+        if warm_start is not None:
+            warm_start = hashlib.sha256(
+                json.dumps(warm_start.to_dict(), sort_keys=True).encode()
+            ).hexdigest()
+
+        return {
+            "data": hashlib.sha256(np.asarray(data, dtype=float).tobytes()).hexdigest(),
+            "model": type(model).__name__,
+            "population_size": int(model_params.population_size),
+            "initial_infectious": np.asarray(
+                model_params.initial_infectious, dtype=float
+            ).tolist(),
+            "warm_start": warm_start,
+            **settings,
+        }
+
+    def path(self, chain: int) -> Path:
+        return self.directory / f"chain_{chain:03d}.nc"
+
+    def __contains__(self, chain: int) -> bool:
+        path = self.path(chain)
+
+        if not path.exists():
+            return False
+
+        with xr.open_dataset(path) as trace:
+            if trace.attrs.get("config") != self.config:
+                raise ValueError(
+                    f"Checkpoint {path} belongs to a run with other data or settings"
+                )
+
+        return True
+
+    def chains(self) -> list[int]:
+        """
+        Stored chains
+
+        :return: Sorted numbers of chains
+        """
+        return sorted(
+            int(path.stem.split("_")[1]) for path in self.directory.glob("chain_*.nc")
+        )
+
+    def save(self, chain: int, posterior: xr.Dataset) -> None:
+        """
+        Save posterior of one chain, the file appears only once fully written
+
+        :param chain: Number of chain
+        :param posterior: Posterior group of InferenceData
+        """
+        path = self.path(chain)
+        temporary = path.with_suffix(".tmp")
+
+        posterior.assign_attrs(config=self.config).to_netcdf(temporary)
+        os.replace(temporary, path)
+
+    def sample_chains(
+        self,
+        sample_chain: Callable[[int], xr.Dataset],
+        chains: int,
+        names: list[str],
+        size: int,
+        rng: np.random.Generator = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Sample chains missing from the store and draw from all of them
+
+        A chain is saved once sampled, a restarted run skips saved chains.
+
+        :param sample_chain: Function sampling the posterior of the chain
+            of the given number
+        :param chains: Number of chains
+        :param names: Names of variables
+        :param size: Number of draws
+        :param rng: Random generator
+
+        :return: Draws of shape (size, ...) by names of variables
+        """
+        for chain in range(chains):
+            if chain not in self:
+                self.save(chain, sample_chain(chain))
+
+        return self.sample(names, size, list(range(chains)), rng)
+
+    def sample(
+        self,
+        names: list[str],
+        size: int,
+        chains: list[int] = None,
+        rng: np.random.Generator = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Draws of variables chosen uniformly from all stored chains
+
+        :param names: Names of variables
+        :param size: Number of draws
+        :param chains: Numbers of chains, all stored chains by default
+        :param rng: Random generator
+
+        :return: Draws of shape (size, ...) by names of variables
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        chains = self.chains() if chains is None else chains
+        traces = [xr.open_dataset(self.path(chain)) for chain in chains]
+
+        if not traces:
+            raise ValueError(f"No chains stored in {self.directory}")
+
+        try:
+            counts = np.array(
+                [trace.sizes["chain"] * trace.sizes["draw"] for trace in traces]
+            )
+            indices = np.sort(rng.integers(counts.sum(), size=size))
+            owners = np.searchsorted(np.cumsum(counts), indices, side="right")
+            samples = {name: [] for name in names}
+
+            for owner, trace in enumerate(traces):
+                local = indices[owners == owner] - counts[:owner].sum()
+
+                if not len(local):
+                    continue
+
+                chain, draw = np.divmod(local, trace.sizes["draw"])
+                draws = trace[names].isel(
+                    chain=xr.DataArray(chain, dims="sample"),
+                    draw=xr.DataArray(draw, dims="sample"),
+                )
+
+                for name in names:
+                    samples[name].append(draws[name].transpose("sample", ...).values)
+        finally:
+            for trace in traces:
+                trace.close()
+
+        return {name: np.concatenate(samples[name]) for name in names}
@@ -0,0 +1,163 @@
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from .ModelParams import ModelParams
+from .ModelParamsBatch import ModelParamsBatch
+
+
+@dataclass
+class WarmStart:
+    """
+    Previous calibration results to start the next calibration from
+
+    :param best_params: Best parameters of the previous calibration
+    :param population: Parameter sets of confidence intervals (posterior sample),
+        may be empty, lists are converted to a batch
+    """
+
+    best_params: ModelParams
+    population: ModelParamsBatch = None
+
+    def __post_init__(self) -> None:
+        self.population = ModelParamsBatch.from_params(
+            [] if self.population is None else self.population
+        )
+
+    @classmethod
+    def from_model(cls, model) -> "WarmStart":
+        """
+        Results of the last calibration of the model
+
+        :param model: Calibrated model
+
+        :return: Warm start of the best and confidence interval parameters
+        """
+        return cls(
+            model.get_best_params(), model.ci_params if model.is_ci_ready else None
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Results as JSON-serializable dictionary
+
+        :return: Dictionary of best parameters and population
+        """
+        return {
+            "best_params": _to_dict(self.best_params),
+            "population": [_to_dict(params) for params in self.population],
+        }
+
+    @classmethod
+    def from_dict(cls, results: dict) -> "WarmStart":
+        """
+        Results from dictionary made by `to_dict`
+
+        :param results: Dictionary of best parameters and population
+
+        :return: Warm start
+        """
+        return cls(
+            ModelParams(**results["best_params"]),
+            ModelParamsBatch.from_params(
+                [ModelParams(**params) for params in results["population"]]
+            ),
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Save results to JSON file
+
+        :param path: Path to file
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path: str) -> "WarmStart":
+        """
+        Load results saved by `save`
+
+        :param path: Path to file
+
+        :return: Warm start
+        """
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+    def best_point(self, alpha_dim: int, beta_dim: int) -> np.ndarray:
+        """
+        Best parameters as a point of the alpha/beta box
+
+        :return: Array of shape (alpha_dim + beta_dim,)
+        """
+        return _to_point(self.best_params, alpha_dim, beta_dim)
+
+    def points(self, alpha_dim: int, beta_dim: int) -> np.ndarray:
+        """
+        Population as points of the alpha/beta box, the best parameters if empty
+
+        :return: Array of shape (len(population), alpha_dim + beta_dim)
+        """
+        if not len(self.population):
+            return self.best_point(alpha_dim, beta_dim)[None]
+
+        if (
+            self.population.alpha.shape[1] < alpha_dim
+            or self.population.beta.shape[1] < beta_dim
+        ):
+            raise ValueError("Warm start parameters do not match dimensions of the model")
+
+        points = np.concatenate(
+            [self.population.alpha[:, :alpha_dim], self.population.beta[:, :beta_dim]],
+            axis=1,
+        )
+
+        return np.clip(points, 0, 1)
+
+    def sample(
+        self,
+        alpha_dim: int,
+        beta_dim: int,
+        size: int,
+        jitter: float,
+        rng: np.random.Generator = None,
+    ) -> np.ndarray:
+        """
+        Points resampled from the population with Gaussian perturbation
+
+        :param size: Number of points
+        :param jitter: Standard deviation of perturbation
+        :param rng: Random generator
+
+        :return: Array of shape (size, alpha_dim + beta_dim) clipped to the box
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        points = self.points(alpha_dim, beta_dim)
+        points = points[rng.integers(len(points), size=size)]
+
+        return np.clip(points + rng.normal(0, jitter, size=points.shape), 0, 1)
+
+
+def _to_dict(params: ModelParams) -> dict:
+    return {
+        "alpha": np.asarray(params.alpha, dtype=float).tolist(),
+        "beta": np.asarray(params.beta, dtype=float).tolist(),
+        "population_size": int(params.population_size),
+        "initial_infectious": np.asarray(params.initial_infectious).tolist(),
+    }
+
+
+def _to_point(params: ModelParams, alpha_dim: int, beta_dim: int) -> np.ndarray:
+    point = np.concatenate(
+        [
+            np.asarray(params.alpha, dtype=float)[:alpha_dim],
+            np.asarray(params.beta, dtype=float)[:beta_dim],
+        ]
+    )
+
+    if len(point) != alpha_dim + beta_dim:
+        raise ValueError("Warm start parameters do not match dimensions of the model")
+
+    return np.clip(point, 0, 1)
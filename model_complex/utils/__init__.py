@@ -1,3 +1,21 @@
-from .ModelParams import ModelParams
+from .ModelParams import FrozenModelParams, ModelParams
+from .ModelParamsBatch import ModelParamsBatch
+from .Profiler import Profiler, profile_phase
+from .SimulationCache import SimulationCache
+from .SimulationResult import SimulationResult
+from .SimulationState import SimulationState
+from .TraceStore import TraceStore
+from .WarmStart import WarmStart
 
-__all__ = ["ModelParams"]
\ No newline at end of file
+__all__ = [
+    "FrozenModelParams",
+    "ModelParams",
+    "ModelParamsBatch",
+    "Profiler",
+    "SimulationCache",
+    "SimulationResult",
+    "SimulationState",
+    "TraceStore",
+    "WarmStart",
+    "profile_phase",
+]
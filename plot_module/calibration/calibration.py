@@ -80,11 +80,15 @@ def calibration_plot(
     #         data.attrs["time_step"],
     #     )
 
-    for ci_par in model.get_ci_params():
-        model.simulate(params=ci_par, modeling_duration=dur)
+    ci_result = model.simulate_batch(model.get_ci_params_batch(), dur)
 
-        res = func_to_get_newly_data()
+    if data.attrs["time_step"] == "week":
+        ci_newly_infected = ci_result.weekly_newly_infected
+
+    else:
+        ci_newly_infected = ci_result.newly_infected
 
+    for res in ci_newly_infected:
         for i in range(len(res)):
             plt.plot(res[i], lw=0.3, alpha=0.5, color=color[i])
 
@@ -1,5 +1,4 @@
 import matplotlib.pyplot as plt
-import numpy as np
 import seaborn as sns
 
 from model_complex import Calibration, FactoryModel, ModelParams
@@ -36,14 +35,8 @@ def interval_estimation_plot(epid_data, city, method, type, save_path, epsilon=3
         calibration.mcmc_calibration(epsilon=epsilon)
 
     # все ниже не должно меняться при добавлении новых моделей
-    alpha = []
-    beta = []
-
-    for params in model.get_ci_params():
-        alpha.append(params.alpha)
-        beta.append(params.beta)
-
-    alpha, beta = np.array(alpha), np.array(beta)
+    ci_params = model.get_ci_params_batch()
+    alpha, beta = ci_params.alpha, ci_params.beta
 
     if type == "age":
         fig, axes = plt.subplots(1, 2, figsize=(10, 5))